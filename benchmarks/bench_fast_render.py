@@ -0,0 +1,48 @@
+'''Per-page render cost of Jinja and of the fast_render generated function.
+
+Timings are over the lms_items_without_wiki_page pages. That the two render the same bytes for every item in the
+database is checked by tests/test_fast_render.py.
+
+Run from the repository root: python -m benchmarks.bench_fast_render
+'''
+
+import argparse
+import sys
+
+import create_lms_page as lms
+from benchmarks.bench_template_env import best_time, build_contexts
+
+
+def render_jinja(contexts: list[lms.LmsRenderView]):
+  template = lms.get_template_env().get_template(lms.TEMPLATE_NAME)
+  for context in contexts:
+    template.render(item=context)
+
+
+def render_fast(contexts: list[lms.LmsRenderView]):
+  template = lms.get_fast_template()
+  for context in contexts:
+    template.render(context)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--rounds", type=int, default=20)
+  args = parser.parse_args()
+
+  if lms.get_fast_template().function is None:
+    sys.exit("The fast renderer doesn't support the template, every page is rendered with Jinja")
+
+  contexts = build_contexts()
+  render_jinja(contexts)
+  render_fast(contexts)
+  jinja = best_time(render_jinja, args.rounds, contexts) / len(contexts)
+  fast = best_time(render_fast, args.rounds, contexts) / len(contexts)
+
+  print(f"{len(contexts)} pages, best of {args.rounds} rounds")
+  print(f"{'per-page render, jinja':<40}{jinja * 1e6:>10.1f} us")
+  print(f"{'per-page render, generated function':<40}{fast * 1e6:>10.1f} us  ({jinja / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,257 @@
+'''Stage-by-stage benchmark of the page pipeline over synthetic item databases.
+
+Builds an items-complete.json style database of the requested sizes, with equipment and weapon sub-objects,
+base items that share names with lms_item_names (including the Ghostly robe top/bottom name collision) and
+existing "(Last Man Standing)" variants, then times each pipeline stage on it separately.
+Results are saved as JSON so runs can be compared across commits with --compare.
+
+Run from the repository root: python -m benchmarks.bench_pipeline --sizes 25000 250000 1000000
+'''
+
+import argparse
+import base64
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+from pathlib import Path
+
+from osrsreboxed.items_api.all_items import AllItems
+
+import create_lms_page as lms
+import item_table
+from item_cache import read_snapshot, write_snapshot
+from item_index import ItemIndex
+from item_stream import load_matching_items
+from page_writer import PageWriter
+
+DEFAULT_SIZES = [25_000, 250_000, 1_000_000]
+RESULTS_DIR = Path("./benchmarks/results")
+WEAPON_TYPES = ["2h_sword", "axe", "bludgeon", "blunt", "bow", "claw", "crossbow", "polearm", "polestaff",
+                "powered staff", "scythe", "slash_sword", "spear", "spiked", "stab sword", "staff", "thrown", "whip"]
+SLOTS = ["head", "cape", "neck", "ammo", "weapon", "body", "shield", "legs", "hands", "feet", "ring", "2h"]
+BONUSES = ["attack_stab", "attack_slash", "attack_crush", "attack_magic", "attack_ranged", "defence_stab",
+           "defence_slash", "defence_crush", "defence_magic", "defence_ranged", "melee_strength",
+           "ranged_strength", "magic_damage", "prayer"]
+FIRST_RELEASE = date(2013, 2, 22)
+
+
+def synthetic_record(rng: random.Random, item_id: int, name: str, wiki_name: str) -> dict:
+  '''One item record shaped like an entry of osrsreboxed's items-complete.json.'''
+  equipable = rng.random() < 0.4
+  weapon = equipable and rng.random() < 0.4
+  release = FIRST_RELEASE + timedelta(days=rng.randrange(4000))
+  record = {
+    "id": item_id,
+    "name": name,
+    "last_updated": "2024-10-01",
+    "incomplete": False,
+    "members": rng.random() < 0.7,
+    "tradeable": rng.random() < 0.6,
+    "tradeable_on_ge": rng.random() < 0.5,
+    "stackable": rng.random() < 0.1,
+    "stacked": None,
+    "noted": False,
+    "noteable": True,
+    "linked_id_item": None,
+    "linked_id_noted": item_id + 1,
+    "linked_id_placeholder": item_id + 2,
+    "placeholder": False,
+    "equipable": equipable,
+    "equipable_by_player": equipable,
+    "equipable_weapon": weapon,
+    "cost": rng.randrange(1, 200_000),
+    "lowalch": rng.randrange(0, 80_000),
+    "highalch": rng.randrange(0, 120_000),
+    "weight": round(rng.uniform(0, 10), 3),
+    "buy_limit": rng.choice([None, 8, 70, 100, 10_000]),
+    "quest_item": False,
+    "release_date": release.isoformat(),
+    "duplicate": rng.random() < 0.2,
+    "examine": f"A synthetic item number {item_id}.",
+    # real icons are 500-1500 base64 characters of PNG
+    "icon": base64.b64encode(rng.randbytes(600)).decode("ascii"),
+    "wiki_name": wiki_name,
+    "wiki_url": "https://oldschool.runescape.wiki/w/" + wiki_name.replace(" ", "_"),
+    "equipment": None,
+    "weapon": None,
+  }
+  if equipable:
+    record["equipment"] = {bonus: rng.randrange(-30, 150) for bonus in BONUSES}
+    record["equipment"]["slot"] = "weapon" if weapon else rng.choice(SLOTS)
+    record["equipment"]["requirements"] = rng.choice([None, {"attack": 70}, {"ranged": 75, "defence": 40}])
+  if weapon:
+    record["weapon"] = {
+      "attack_speed": rng.randrange(2, 8),
+      "weapon_type": rng.choice(WEAPON_TYPES),
+      "stances": [{"combat_style": style, "attack_type": "slash", "attack_style": "aggressive",
+                   "experience": "strength", "boosts": None} for style in ("chop", "slash", "lunge", "block")],
+    }
+  return record
+
+
+def synthetic_names(size: int) -> list[tuple[str, str]]:
+  '''(name, wiki_name) for every synthetic item: mostly filler, plus LMS base items, their Last Man Standing
+  variants and Ghostly robe top/bottom pairs that share one name.'''
+  base_names = sorted(set(lms.lms_item_names))
+  names = []
+  for i in range(size):
+    if i % 40 == 0:
+      name = base_names[(i // 40) % len(base_names)]
+      names.append((name, name))
+    elif i % 40 == 1:
+      name = base_names[(i // 40) % len(base_names)]
+      names.append((name, f"{name} (Last Man Standing)"))
+    elif i % 997 == 2:
+      names.append(("Ghostly robe", "Ghostly robe (top)" if (i // 997) % 2 else "Ghostly robe (bottom)"))
+    else:
+      names.append((f"Synthetic item {i}", f"Synthetic item {i}"))
+  return names
+
+
+def write_synthetic_database(path: Path, size: int, seed: int = 0):
+  '''Stream a synthetic items-complete.json to path, one record at a time.'''
+  rng = random.Random(seed)
+  with open(path, "w") as f:
+    f.write("{")
+    for item_id, (name, wiki_name) in enumerate(synthetic_names(size)):
+      if item_id:
+        f.write(",")
+      f.write(f'\n"{item_id}": ')
+      json.dump(synthetic_record(rng, item_id, name, wiki_name), f)
+    f.write("\n}")
+
+
+# several pipeline stages print or pprint every item they touch
+DEVNULL = open(os.devnull, "w")
+# pprinter binds sys.stdout when it is created, so redirect_stdout alone doesn't silence it
+lms.pprinter = lms.CustomPrettyPrinter(exclude_attr=lms.exclude_icon, stream=DEVNULL)
+
+
+class StageTimer:
+  def __init__(self):
+    self.stages: dict[str, dict] = {}
+
+  def run(self, stage: str, func, *args, count: int | None = None):
+    '''Time func(*args) with its output discarded.'''
+    with redirect_stdout(DEVNULL):
+      start = time.perf_counter()
+      result = func(*args)
+      elapsed = time.perf_counter() - start
+    self.stages[stage] = {"seconds": elapsed}
+    if count is not None:
+      self.stages[stage]["count"] = count(result) if callable(count) else count
+    print(f"  {stage:<22}{elapsed:>10.4f}s  {self.stages[stage].get('count', '')}", flush=True)
+    return result
+
+
+def bench_size(size: int, max_pages: int, workdir: Path) -> dict:
+  timer = StageTimer()
+  db_path = workdir / f"items-{size}.json"
+  start = time.perf_counter()
+  write_synthetic_database(db_path, size)
+  print(f"{size} items: generated {db_path.stat().st_size / 1e6:.0f}MB database in {time.perf_counter() - start:.1f}s")
+
+  items = timer.run("load_json", AllItems, db_path, count=len)
+  snapshot = workdir / f"items-{size}.pickle"
+  write_snapshot(items, snapshot)
+  timer.run("load_snapshot", read_snapshot, snapshot, count=len)
+  timer.run("load_projection", load_matching_items, lms.lms_item_names, (), lms.is_lms_wiki_name, db_path, count=len)
+
+  index = timer.run("index", ItemIndex, items, count=len)
+  matched = timer.run("get_all_matching_items", lms.get_all_matching_items, index, lms.lms_item_names, count=len)
+  # classifies into every registered variant in one pass, as the render and missing commands do
+  timer.run("missing_pages",
+            lambda: lms.get_missing_lms_wiki_pages(lms.get_variant_wiki_pages(index, lms.VARIANTS.values())[lms.LMS.key],
+                                                   lms.lms_item_names), count=len)
+  if item_table.np is not None:
+    table = timer.run("table_build", item_table.ItemTable, items, count=len)
+    timer.run("table_scan",
+              lambda: table.select(table.non_duplicate() & table.wiki_name_contains("Last Man Standing")), count=len)
+
+  # LMS pages only exist for equipment, the template needs the equipment bonuses
+  base_items = [item for item in matched if not item.duplicate and item.equipment][:max_pages]
+  overrides = [lms.LmsItem(buy_limit=None, cost=10, highalch=0, id=item.id + 1_000_000, linked_id_noted=0,
+                           linked_id_placeholder=None, lowalch=0, members=False, noteable=True, tradeable=False,
+                           tradeable_on_ge=False) for item in base_items]
+  lms_items = timer.run("create_lms_item", lambda: [lms.create_lms_item(item, override)
+                                                    for item, override in zip(base_items, overrides)], count=len)
+  # give every page a unique name, synthetic base items reuse the same handful of names
+  for item in lms_items:
+    item.wiki_name = f"{item.wiki_name} {item.id}"
+  pages = timer.run("render", lambda: [(item.wiki_name, lms.render_template(item)) for item in lms_items], count=len)
+
+  def write_pages():
+    with PageWriter(workdir / f"pages-{size}") as writer:
+      for page_name, text in pages:
+        writer.submit(page_name, text)
+    return writer
+  timer.run("write", write_pages, count=lambda writer: writer.bytes_written)
+
+  db_path.unlink()
+  snapshot.unlink()
+  return timer.stages
+
+
+def git_commit() -> str:
+  try:
+    return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return "unknown"
+
+
+def compare(results: dict, baseline_path: Path, threshold: float) -> bool:
+  '''Print each stage's time relative to a previous results file. Returns True if any stage regressed.'''
+  with open(baseline_path) as f:
+    baseline = json.load(f)
+  regressed = False
+  print(f"\nCompared to {baseline_path} ({baseline['meta']['commit']}):")
+  for size, stages in results["sizes"].items():
+    for stage, result in stages.items():
+      old = baseline["sizes"].get(size, {}).get(stage)
+      if not old or not old["seconds"]:
+        continue
+      ratio = result["seconds"] / old["seconds"]
+      flag = "  REGRESSION" if ratio > threshold else ""
+      regressed |= bool(flag)
+      print(f"  {size:>8} {stage:<22}{old['seconds']:>10.4f}s -> {result['seconds']:>8.4f}s  {ratio:5.2f}x{flag}")
+  return regressed
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="synthetic database sizes")
+  parser.add_argument("--pages", type=int, default=1000, help="max pages to build, render and write per size")
+  parser.add_argument("--output", type=Path, help="results file, default ./benchmarks/results/<commit>.json")
+  parser.add_argument("--compare", type=Path, help="previous results file to compare against")
+  parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+  args = parser.parse_args()
+
+  commit = git_commit()
+  results = {
+    "meta": {"commit": commit, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+             "python": platform.python_version(), "platform": platform.platform()},
+    "sizes": {},
+  }
+  with tempfile.TemporaryDirectory() as workdir:
+    for size in args.sizes:
+      results["sizes"][str(size)] = bench_size(size, args.pages, Path(workdir))
+
+  output = args.output or RESULTS_DIR / f"{commit}.json"
+  output.parent.mkdir(parents=True, exist_ok=True)
+  with open(output, "w") as f:
+    json.dump(results, f, indent=2)
+  print(f"Results written to {output}")
+
+  if args.compare and compare(results, args.compare, args.threshold):
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,86 @@
+'''Per-page render cost before and after sharing the compiled template environment.
+
+"fresh env" is what create_template used to do: build an Environment and compile the template for every page.
+"shared env" is get_template_env(). The first-load rows show what a new process pays to get the template,
+with and without the on-disk bytecode cache.
+
+Run from the repository root: python -m benchmarks.bench_template_env
+'''
+
+import argparse
+import io
+import time
+from contextlib import redirect_stdout
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+import create_lms_page as lms
+from item_cache import load_items
+from item_index import ItemIndex
+
+
+def build_contexts() -> list[lms.LmsRenderView]:
+  '''Template contexts for every page in lms_items_without_wiki_page.'''
+  index = ItemIndex(load_items())
+  contexts = []
+  # create_lms_item and LmsRenderView print progress for every item
+  with redirect_stdout(io.StringIO()):
+    for name, data in lms.lms_items_without_wiki_page.items():
+      item = lms.create_lms_item(lms.resolve_base_item(index, name), lms.LmsItem(**data))
+      contexts.append(lms.LmsRenderView(item))
+  return contexts
+
+
+def render_fresh_env(contexts: list[lms.LmsRenderView]):
+  for context in contexts:
+    env = Environment(loader=FileSystemLoader(lms.TEMPLATE_DIR))
+    env.get_template(lms.TEMPLATE_NAME).render(item=context)
+
+
+def render_shared_env(contexts: list[lms.LmsRenderView]):
+  for context in contexts:
+    lms.get_template_env().get_template(lms.TEMPLATE_NAME).render(item=context)
+
+
+def first_load_without_cache():
+  Environment(loader=FileSystemLoader(lms.TEMPLATE_DIR)).get_template(lms.TEMPLATE_NAME)
+
+
+def first_load_with_bytecode_cache():
+  env = Environment(loader=FileSystemLoader(lms.TEMPLATE_DIR),
+                    bytecode_cache=FileSystemBytecodeCache(lms.BYTECODE_CACHE_DIR))
+  env.get_template(lms.TEMPLATE_NAME)
+
+
+def best_time(func, rounds: int, *args) -> float:
+  best = float("inf")
+  for _ in range(rounds):
+    start = time.perf_counter()
+    func(*args)
+    best = min(best, time.perf_counter() - start)
+  return best
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--rounds", type=int, default=20)
+  args = parser.parse_args()
+
+  contexts = build_contexts()
+  # warm the shared environment and the bytecode cache so both rows measure steady state
+  render_shared_env(contexts)
+  first_load_with_bytecode_cache()
+
+  fresh = best_time(render_fresh_env, args.rounds, contexts) / len(contexts)
+  shared = best_time(render_shared_env, args.rounds, contexts) / len(contexts)
+  no_cache = best_time(first_load_without_cache, args.rounds)
+  bytecode = best_time(first_load_with_bytecode_cache, args.rounds)
+
+  print(f"{len(contexts)} pages, best of {args.rounds} rounds")
+  print(f"{'per-page render, fresh env':<40}{fresh * 1e6:>10.1f} us")
+  print(f"{'per-page render, shared env':<40}{shared * 1e6:>10.1f} us  ({fresh / shared:.1f}x)")
+  print(f"{'first template load, compile':<40}{no_cache * 1e6:>10.1f} us")
+  print(f"{'first template load, bytecode cache':<40}{bytecode * 1e6:>10.1f} us  ({no_cache / bytecode:.1f}x)")
+
+
+if __name__ == "__main__":
+  main()
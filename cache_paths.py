@@ -0,0 +1,9 @@
+'''Where the generated caches live.
+
+The item snapshot, the name index, the catalogue and the HTTP cache all sit under ./.cache. The path is kept
+in this import-free module so modules that only need it, like item_fetch, don't pull in osrsreboxed.
+'''
+
+from pathlib import Path
+
+CACHE_DIR = Path("./.cache")
@@ -4,16 +4,43 @@
 #  Get item name and query chisel (https://chisel.weirdgloop.org/moid/item_name.html) to get object data, or query wiki with non-LMS name to get stats
 #  Collect all items and their data and populate a template, written out to rs_wiki/ppage_outputs/<item_name>.wikitext
 
-from dataclasses import dataclass, asdict, replace
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import redirect_stdout
+from dataclasses import dataclass, fields, replace
 from datetime import datetime
+from functools import lru_cache, partial
 from pprint import pprint, pformat
 from pprint import PrettyPrinter
-from typing import Optional
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional
+
+from item_variants import Variant, classify_items, marker_pattern
+from metrics import metrics
+
+# jinja2, osrsreboxed and the modules built on them are imported where they are used, so importing this module
+# for LmsItem, create_lms_item or the item lists costs next to nothing; main() only loads what its command needs
+if TYPE_CHECKING:
+  import argparse
+  import cProfile
 
-from jinja2 import Environment, FileSystemLoader
-from osrsreboxed import items_api
-from osrsreboxed.items_api.item_properties import ItemProperties
-from osrsreboxed.items_api.all_items import AllItems
+  from jinja2 import Environment
+  from osrsreboxed.items_api.all_items import AllItems
+  from osrsreboxed.items_api.item_properties import ItemProperties
+
+  from fast_render import FastTemplate
+  from item_catalogue import Catalogue
+  from item_fetch import AsyncFetcher
+  from item_index import ItemIndex
+  from name_index import NameIndex
+  from page_export import ArchiveWriter
+  from page_manifest import PageManifest
+  from page_writer import PageWriter
+  from wiki_api import WikiClient
 
 
 class CustomPrettyPrinter(PrettyPrinter):
@@ -50,6 +77,10 @@ class LmsItem:
   tradeable: Optional[bool]
   tradeable_on_ge: bool
 
+  def as_overrides(self) -> dict:
+    '''Shallow name -> value dict for replace(); every field is a scalar so asdict's deep copy isn't needed.'''
+    return {field.name: getattr(self, field.name) for field in fields(self)}
+
 
 def print_only_attr(obj: ItemProperties | list[ItemProperties], attr: str):
   if isinstance(obj, list):
@@ -65,50 +96,52 @@ def get_only_attr(obj: ItemProperties | list[ItemProperties], attr: str):
     return getattr(obj, attr)
 
 
-def get_all_matching_items(items: AllItems, lms_item_names: list[str]) -> list[ItemProperties]:
+def get_all_matching_items(index: ItemIndex | Catalogue, lms_item_names: list[str]) -> list[ItemProperties]:
   '''Get list of all items with name match to lms_item_names list'''
-  lms_items = [x for x in items if x.name in lms_item_names]
+  lms_items = index.items_named(lms_item_names)
   print("Number of lms items returned: ", len(lms_items))
   print_only_attr(lms_items, "name")
-  pprinter.pprint(lms_items)
+  # one item at a time, so the formatted text of the whole list is never built in memory at once
+  for item in lms_items:
+    pprinter.pprint(item)
   return lms_items
 
 
 def compare_items_by_id(id1: int, id2: int, items: AllItems):
+  from item_diff import diff_fields
+
   item1 = items.lookup_by_item_id(id1)
   item2 = items.lookup_by_item_id(id2)
-  dict1 = asdict(item1)
-  dict2 = asdict(item2)
-  differences = {key: (dict1[key], dict2[key])
-                 for key in dict1 if dict1[key] != dict2[key]}
-  pprinter.pprint(differences)
+  pprinter.pprint(diff_fields(item1, item2))
 
 
 def compare_items(item1: ItemProperties, item2: ItemProperties, items: AllItems):
-  dict1 = asdict(item1)
-  dict2 = asdict(item2)
-  differences = {key: (dict1[key], dict2[key])
-                 for key in dict1 if dict1[key] != dict2[key]}
-  pprinter.pprint(differences)
+  from item_diff import diff_fields
 
+  pprinter.pprint(diff_fields(item1, item2))
 
-def create_lms_item(original_item: ItemProperties, lms_item: LmsItem) -> ItemProperties:
-  '''Create a new LMS variant of an item, given an existing ItemProperties obj.'''
+
+def lms_wiki_url(original_item: ItemProperties) -> str:
+  # the LMS variant's page, see Variant.wiki_url for how a #section like Dragon_knife#Unpoisoned is dropped
+  return LMS.wiki_url(original_item.wiki_url)
+
+
+def create_lms_item(original_item: ItemProperties, lms_item: LmsItem, variant: Optional[Variant] = None) -> ItemProperties:
+  '''Create a new LMS variant of an item, or of another registered variant, given an existing ItemProperties obj.'''
+  variant = variant or LMS
   # create separate case for ghostly robe as both top and bottom item.names are "Ghostly robe"
   if "Ghostly robe" in original_item.wiki_name:
     lms_object = replace(original_item,
                          name=original_item.wiki_name,
-                         wiki_name=original_item.wiki_name + " (Last Man Standing)",
-                         # Split and remove any subsections from the wiki_url, e.g. Dragon_knife#Unpoisoned -> Dragon_knife
-                         wiki_url=original_item.wiki_url.split("#", 1)[0] + "_(Last_Man_Standing)",
-                         **asdict(lms_item)
+                         wiki_name=variant.wiki_name(original_item.wiki_name),
+                         wiki_url=variant.wiki_url(original_item.wiki_url),
+                         **lms_item.as_overrides()
                         )
   else:
     lms_object = replace(original_item,
-                         wiki_name=original_item.wiki_name + " (Last Man Standing)",
-                         # Split and remove any subsections from the wiki_url, e.g. Dragon_knife#Unpoisoned -> Dragon_knife
-                         wiki_url=original_item.wiki_url.split("#", 1)[0] + "_(Last_Man_Standing)",
-                         **asdict(lms_item)
+                         wiki_name=variant.wiki_name(original_item.wiki_name),
+                         wiki_url=variant.wiki_url(original_item.wiki_url),
+                         **lms_item.as_overrides()
                         )
     print(f"Created lms object: {lms_object}")
   return lms_object
@@ -123,46 +156,278 @@ def convert_date_format(date_str):
   return formatted_date
 
 
-def create_template(item: ItemProperties):
+PAGE_OUTPUT_DIR = "./page_outputs"
+TEMPLATE_DIR = "./templates"
+TEMPLATE_NAME = "lms_wikitext_template.wikitext.j2"
+BYTECODE_CACHE_DIR = "./templates/.bytecode_cache"
+LMS_RELEASE_DATE = "2016-08-04"
+
+
+@lru_cache(maxsize=None)
+def get_template_env() -> Environment:
+  '''Shared Environment for the whole process.
+  Jinja keeps the compiled template in memory and only reloads it when the file changes on disk, and the
+  bytecode cache in ./templates/.bytecode_cache lets new processes skip compiling until the template source changes.'''
+  from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+  os.makedirs(BYTECODE_CACHE_DIR, exist_ok=True)
+  return Environment(loader=FileSystemLoader(TEMPLATE_DIR),
+                     bytecode_cache=FileSystemBytecodeCache(BYTECODE_CACHE_DIR))
+
+
+class LmsRenderView:
+  '''The fields lms_wikitext_template.wikitext.j2 reads, with the derived attack_range, options and wiki formatted
+  release_date precomputed. equipment and weapon are the item's own objects, nothing is copied.'''
+  __slots__ = ("id", "name", "wiki_name", "wiki_url", "examine", "cost", "weight",
+               "release_date", "options", "attack_range", "equipment", "weapon")
+
+  def __init__(self, item: ItemProperties, min_release_date: Optional[str] = LMS_RELEASE_DATE):
+    self.id = item.id
+    self.name = item.name
+    self.wiki_name = item.wiki_name
+    self.wiki_url = item.wiki_url
+    self.examine = item.examine
+    self.cost = item.cost
+    self.weight = item.weight
+    self.equipment = item.equipment
+    self.weapon = item.weapon
+
+    # check if weapon, create attack range key/value
+    self.attack_range = None
+    if item.weapon:
+      item_range = 0
+      if item.weapon.weapon_type in ["2h_sword", "axe", "blaster", "bludgeon", "blunt", "claw", "pickaxe", "polearm", "polestaff", "powered staff", "scythe", "slash_sword", "spear", "spiked", "stab sword", "whip"]:
+        item_range = 1
+      if item.weapon.weapon_type in ["bow"]:
+        item_range = 10
+      if item.weapon.weapon_type in ["crossbow"]:
+        item_range = 8  # zaryte crossbow
+      if item.weapon.weapon_type == "thrown":
+        item_range = 4
+      if item.weapon.weapon_type == "staff":
+        item_range = "staff"
+      self.attack_range = item_range
+
+    # update item.release_date for wikitext formatting
+    # check if release_date is older than 4 August 2016, if so, replace release date with 4 August 2016, as that is the date LMS released
+    # (or with the release date of the variant's own minigame)
+    release_date = item.release_date
+    if min_release_date and release_date < min_release_date:
+      print(f"{release_date} is before {min_release_date}")
+      release_date = min_release_date
+    self.release_date = convert_date_format(release_date)
+
+    # set the item options: "Wield, Drop" if a weapon, "Wear, Drop" if armor
+    if item.equipable_weapon or \
+      (item.stackable and item.equipment.slot == "ammo") or \
+      (item.equipable and item.equipment.slot == "shield"):
+      self.options = "Wield, Drop"
+    else:
+      self.options = "Wear, Drop"
+
+  def as_dict(self) -> dict:
+    '''Shallow name -> value dict of the view, used to hash a page's inputs.'''
+    return {name: getattr(self, name) for name in self.__slots__}
+
+
+# render through fast_render's generated functions instead of Jinja, set by --fast-render
+_fast_render = False
+
+
+def set_fast_render(enabled: bool):
+  global _fast_render
+  _fast_render = enabled
+
+
+@lru_cache(maxsize=None)
+def get_fast_template(template_name: str = TEMPLATE_NAME) -> FastTemplate:
+  '''template_name compiled once per process into a plain Python function, with Jinja as the fallback.'''
+  from fast_render import FastTemplate
+
+  return FastTemplate(get_template_env(), template_name)
+
+
+def render_template(item: ItemProperties | LmsRenderView, template_name: str = TEMPLATE_NAME) -> str:
+  '''Render the wikitext page for item without writing it anywhere.'''
+  view = item if isinstance(item, LmsRenderView) else LmsRenderView(item)
+  if _fast_render:
+    return get_fast_template(template_name).render(view)
+  return get_template_env().get_template(template_name).render(item=view)
+
+
+def render_page(item: ItemProperties, manifest: Optional[PageManifest] = None,
+                variant: Optional[Variant] = None) -> Optional[str]:
+  '''Render item's page with its variant's template (LMS by default) and record it in manifest, or return None if
+  the manifest says the page is unchanged.'''
+  from page_manifest import hash_inputs
+
+  variant = variant or LMS
+  env = get_template_env()
+  with metrics.stage("render_view"):
+    view = LmsRenderView(item, variant.release_date)
+
+  input_hash = None
+  if manifest is not None:
+    with metrics.stage("manifest_check"):
+      input_hash = hash_inputs(view.as_dict(), env.loader.get_source(env, variant.template_name)[0])
+      fresh = manifest.is_fresh(item.wiki_name, input_hash)
+    if fresh:
+      manifest.mark_skipped(item.wiki_name)
+      metrics.count("manifest_cache_hits")
+      return None
+
+  with metrics.stage("render"):
+    output = render_template(view, variant.template_name)
+  metrics.count("pages_rendered")
+  if manifest is not None:
+    manifest.record(item.wiki_name, input_hash, output)
+  return output
+
+
+def create_template(item: ItemProperties,
+                    manifest: Optional[PageManifest] = None,
+                    writer: Optional[PageWriter] = None,
+                    variant: Optional[Variant] = None) -> bool:
   '''Create wikitext page by populating lms_wikitext_template.wikitext.j2 template.
-  Created files will be created at ./page_outputs/{item_name}.wikitext'''
-  env = Environment(loader=FileSystemLoader('./templates'))
-  template = env.get_template('lms_wikitext_template.wikitext.j2')
-  item_dict = asdict(item)
-
-  # check if weapon, create attack range key/value
-  if item.weapon:
-    item_range = 0
-    if item.weapon.weapon_type in ["2h_sword", "axe", "blaster", "bludgeon", "blunt", "claw", "pickaxe", "polearm", "polestaff", "powered staff", "scythe", "slash_sword", "spear", "spiked", "stab sword", "whip"]:
-      item_range = 1
-    if item.weapon.weapon_type in ["bow"]:
-      item_range = 10
-    if item.weapon.weapon_type in ["crossbow"]:
-      item_range = 8  # zaryte crossbow
-    if item.weapon.weapon_type == "thrown":
-      item_range = 4
-    if item.weapon.weapon_type == "staff":
-      item_range = "staff"
-    item_dict["attack_range"] = item_range
-
-  # update item.release_date for wikitext formatting
-  # check if release_date is older than 4 August 2016, if so, replace release date with 4 August 2016, as that is the date LMS released
-  if item.release_date < "2016-08-04":
-    print(f"{item.release_date} is before 4 August 2016")
-    item_dict["release_date"] = "2016-08-04"
-  item_dict["release_date"] = convert_date_format(item_dict["release_date"])
-    
-  # set the item options: "Wield, Drop" if a weapon, "Wear, Drop" if armor
-  if item.equipable_weapon or \
-    (item.stackable and item.equipment.slot == "ammo") or \
-    (item.equipable and item.equipment.slot == "shield"):
-    item_dict["options"] = "Wield, Drop"
+  Created files will be created at ./page_outputs/{item_name}.wikitext, atomically, or queued on writer if one is given.
+  If a manifest is given, pages whose inputs haven't changed since the last run are skipped. Returns whether the page was rendered.'''
+  from page_export import wiki_title
+  from page_writer import page_path, write_atomic
+
+  output = render_page(item, manifest, variant)
+  if output is None:
+    return False
+  # identical files are left untouched so their timestamps don't change
+  if writer is not None:
+    with metrics.stage("write_queue"):
+      writer.submit(item.wiki_name, output, wiki_title(item.wiki_url))
+  else:
+    with metrics.stage("write"):
+      if write_atomic(page_path(PAGE_OUTPUT_DIR, item.wiki_name), output):
+        metrics.count("bytes_written", len(output.encode("utf-8")))
+  return True
+
+
+class BatchRenderError(Exception):
+  '''Raised by render_all once every job has run, listing each item that failed to render.'''
+  def __init__(self, errors: list[tuple[str, BaseException]]):
+    self.errors = errors
+    super().__init__(f"{len(errors)} page(s) failed to render: " + ", ".join(f"{name} ({e!r})" for name, e in errors))
+
+
+class _PageBuffer:
+  '''Stands in for the writer of one thread worker job, holding its pages until render_all hands them on in job order.'''
+  def __init__(self):
+    self.pages: list[tuple[str, str, Optional[str]]] = []
+
+  def submit(self, page_name: str, text: str, title: Optional[str] = None):
+    self.pages.append((page_name, text, title))
+
+
+# manifest page entries shared with render workers, set once per worker by _init_render_worker
+_worker_manifest_pages: Optional[dict] = None
+
+
+def _init_render_worker(manifest_pages: Optional[dict], fast_render: bool = False):
+  global _worker_manifest_pages
+  _worker_manifest_pages = manifest_pages
+  set_fast_render(fast_render)
+
+
+def _render_job(original_item: ItemProperties,
+                lms_item: LmsItem,
+                manifest_dir: Optional[str],
+                writer: Optional[PageWriter] = None,
+                collect_metrics: bool = False,
+                variant_key: str = "lms") -> tuple[str, Optional[PageManifest], Optional[dict]]:
+  '''Build and render one LMS page inside a render_all worker.
+  With collect_metrics the job's own metrics are returned, for process workers whose metrics object isn't shared.
+  The variant goes by its key so process workers look it up in their own VARIANTS instead of unpickling its overrides.'''
+  from page_manifest import PageManifest
+
+  if collect_metrics:
+    metrics.reset()
+  variant = VARIANTS[variant_key]
+  with metrics.stage("create_lms_item"):
+    item = create_lms_item(original_item, lms_item, variant)
+  job_manifest = None
+  if manifest_dir is not None:
+    job_manifest = PageManifest(manifest_dir, _worker_manifest_pages).for_page(item.wiki_name)
+  create_template(item, job_manifest, writer, variant)
+  return item.wiki_name, job_manifest, metrics.to_dict() if collect_metrics else None
+
+
+def render_all(jobs: Iterable[tuple[str, ItemProperties, LmsItem]],
+               workers: int = 1,
+               executor: str = "process",
+               manifest: Optional[PageManifest] = None,
+               writer: Optional[PageWriter] = None,
+               variant: Optional[Variant] = None) -> list[str]:
+  '''Run create_lms_item and create_template for each (name, original_item, lms_item) job of variant (LMS by
+  default), fanned out over a process or thread pool when workers > 1.
+  Returns the rendered page names in job order, whatever order the workers finish in. Failed jobs don't stop
+  the batch, they are raised together as a BatchRenderError after the manifest has been updated for the rest;
+  their pages still count as seen, so they keep their last good output.
+  Pages go to writer in job order in serial and thread mode, so an archive comes out the same every run; process
+  workers can't share it and write their pages themselves.'''
+  from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+  jobs = list(jobs)
+  variant_key = (variant or LMS).key
+  manifest_dir = str(manifest.output_dir) if manifest is not None else None
+  manifest_pages = manifest.pages if manifest is not None else None
+
+  outcomes = []
+  if workers <= 1:
+    _init_render_worker(manifest_pages, _fast_render)
+    for name, original_item, lms_item in jobs:
+      try:
+        outcomes.append((name, _render_job(original_item, lms_item, manifest_dir, writer, variant_key=variant_key), None))
+      except Exception as e:
+        outcomes.append((name, None, e))
   else:
-    item_dict["options"] = "Wear, Drop"
+    if executor == "process":
+      pool_class = ProcessPoolExecutor
+    elif executor == "thread":
+      pool_class = ThreadPoolExecutor
+    else:
+      raise ValueError(f"Unknown executor {executor!r}, expected 'process' or 'thread'")
+    with pool_class(max_workers=workers, initializer=_init_render_worker, initargs=(manifest_pages, _fast_render)) as pool:
+      buffer_pages = executor == "thread" and writer is not None
+      collect_metrics = executor == "process"
+      futures = []
+      for name, original_item, lms_item in jobs:
+        job_writer = _PageBuffer() if buffer_pages else None
+        futures.append((name, job_writer, pool.submit(_render_job, original_item, lms_item, manifest_dir, job_writer,
+                                                      collect_metrics, variant_key)))
+      for name, job_writer, future in futures:
+        try:
+          outcomes.append((name, future.result(), None))
+        except Exception as e:
+          outcomes.append((name, None, e))
+          continue
+        if job_writer is not None:
+          for page in job_writer.pages:
+            writer.submit(*page)
 
-  output = template.render(item=item_dict)
-  with open(f"./page_outputs/{item.wiki_name}.wikitext", "w") as f:
-    f.write(output)
+  page_names = []
+  errors = []
+  for (name, result, error), (_, original_item, _) in zip(outcomes, jobs):
+    if error is not None:
+      errors.append((name, error))
+      if manifest is not None:
+        # the page's last good file and entry stay, --prune mustn't take a failed render for an orphan
+        manifest.seen.add(VARIANTS[variant_key].wiki_name(original_item.wiki_name))
+      continue
+    page_name, job_manifest, job_metrics = result
+    page_names.append(page_name)
+    if manifest is not None:
+      manifest.merge(job_manifest)
+    if job_metrics is not None:
+      metrics.merge(job_metrics)
+  if errors:
+    raise BatchRenderError(errors)
+  return page_names
 
 
 lms_item_names = [
@@ -926,43 +1191,809 @@ lms_items_without_wiki_page = {
     }
 }
 
-items = items_api.load()
+# minigame-exclusive variants, classified together in one pass over the items. Only LMS has override data and a
+# template so far; the others are counted, and rendered once they get both.
+VARIANTS = {variant.key: variant for variant in [
+  Variant("lms", "Last Man Standing", "{base_url}_(Last_Man_Standing)", lms_items_without_wiki_page,
+          TEMPLATE_NAME, LMS_RELEASE_DATE),
+  Variant("deadman", "Deadman Mode", "{base_url}_(Deadman_Mode)"),
+  # the PvP Arena was called the Emir's Arena when these pages were made
+  Variant("pvp-arena", "Emir's Arena", "{base_url}_(Emir's_Arena)"),
+  Variant("soul-wars", "Soul Wars", "{base_url}_(Soul_Wars)"),
+]}
+LMS = VARIANTS["lms"]
+
+# special-cased base items that can't be resolved by name, see the lookup loop in main()
+OPAL_DRAGON_BOLTS_E_ID = 21932
+
+
+def is_lms_wiki_name(wiki_name: str) -> bool:
+  return LMS.suffix in wiki_name
+
 
-# compare_items(23605, 21795, items)  # imbued zammy cape
-# compare_items(9243, 23649, items)   # diamond bolts (e)
-# compare_items(7462, 23593, items)   # barrows gloves
+def get_variant_wiki_pages(index: ItemIndex | Catalogue,
+                           variants: Iterable[Variant]) -> dict[str, list[ItemProperties]]:
+  '''Non-duplicate items that already have a wiki page, by variant key, from a single scan of index.'''
+  variants = list(variants)
+  return classify_items(index.wiki_name_contains_any(variant.marker for variant in variants), variants)
 
-# cut this list down to only the normal version of each item and store in lms_items
-# get_all_matching_items(items, lms_item_names)
 
-# ad hoc search for items when item issues arise
-# get_all_matching_items(items, ["Opal dragon bolts"])
+def get_missing_lms_wiki_pages(lms_wiki_pages: list[ItemProperties], lms_item_names: list[str]) -> list[str]:
+  '''Names in lms_item_names that none of lms_wiki_pages belong to.'''
+  lms_item_names_with_wiki_pages = set(get_only_attr(lms_wiki_pages, "name"))
+  return sorted([item for item in lms_item_names if item not in lms_item_names_with_wiki_pages])
 
-# Get list of all existing wiki pages for LMS items
-lms_wiki_pages = [x for x in items if getattr(x, "wiki_name", "") and
-                  "Last Man Standing" in getattr(x, "wiki_name", "") and
-                  x.duplicate == False]
-print("Number of lms items with wiki pages: ", len(lms_wiki_pages))
-# pprinter.pprint(lms_wiki_pages)
-# print_only_attr(lms_wiki_pages, "name")
 
-# store missing_lms_wiki_pages as a dict above, lms_items_without_wiki_page
-lms_item_names_with_wiki_pages = get_only_attr(lms_wiki_pages, "name")
-missing_lms_wiki_pages = sorted([item for item in lms_item_names if item not in lms_item_names_with_wiki_pages])
-# print("Number of lms items without wiki pages: ", len(missing_lms_wiki_pages))
-# print("lms items without wiki pages:\n", pformat(missing_lms_wiki_pages))
+def load_lms_items(projection: bool = False, use_cache: bool = True,
+                   overrides: Optional[dict[str, dict]] = None) -> AllItems:
+  '''Load the item database, or with projection=True only the items this script reads, streamed from items-complete.json.
+  The projection covers every registered variant, with overrides in place of the LMS variant's built-in ones.'''
+  from item_cache import load_items
+  from item_stream import load_matching_items
 
-for name, data in lms_items_without_wiki_page.items():
-  print(name)
-  temp = LmsItem(**data)
-  
+  if not projection:
+    # loads from the on-disk snapshot in ./.cache when it matches the installed osrsreboxed database
+    return load_items(use_cache=use_cache)
+  start = time.perf_counter()
+  all_overrides = [overrides if overrides is not None and variant is LMS else variant.overrides
+                   for variant in VARIANTS.values()]
+  variant_markers = marker_pattern(VARIANTS.values())
+  items = load_matching_items(names=set(lms_item_names).union(*all_overrides),
+                              ids={data["id"] for entries in all_overrides for data in entries.values()} | {OPAL_DRAGON_BOLTS_E_ID},
+                              wiki_name_predicate=lambda wiki_name: variant_markers.search(wiki_name) is not None)
+  print(f"Loaded {len(items)} projected items from items-complete.json in {time.perf_counter() - start:.3f}s")
+  return items
+
+
+def base_item_key(name: str) -> tuple[str, str | int]:
+  '''Which attribute identifies the base item of an LMS variant in lms_items_without_wiki_page: ("name", name),
+  ("wiki_name", name) or ("id", item_id).'''
   # enable wiki name for ghostly robe top because of name collision with ghostly robe bottoms
   # TODO: investigate why this isn't creating two separate page files
   if name in ["Ghostly robe (top)", "Ghostly robe (bottom)"]:
-    original_item = items.lookup_by_item_name(name, True)
+    return "wiki_name", name
   elif name == "Opal dragon bolts (e)":
-    original_item = items.lookup_by_item_id(21932)
+    return "id", OPAL_DRAGON_BOLTS_E_ID
+  return "name", name
+
+
+def has_item_name(index: ItemIndex | Catalogue, name: str) -> bool:
+  '''Whether some item has name as its name or wiki_name, ignoring case.'''
+  for use_wiki_name in (False, True):
+    try:
+      index.lookup_by_item_name(name, use_wiki_name)
+      return True
+    except ValueError:
+      pass
+  return False
+
+
+def resolve_lms_item_names(index: ItemIndex | Catalogue, names: list[str],
+                           get_name_index: Callable[[], NameIndex]) -> list[str]:
+  '''names with each one that matches no item replaced by its confident fuzzy match, if it has one.
+  Every fuzzy or failed match is printed; the name index is only loaded when some name needs it.'''
+  resolved = []
+  for name in names:
+    if has_item_name(index, name):
+      resolved.append(name)
+      continue
+    match = get_name_index().resolve(name)
+    metrics.count("fuzzy_name_matches" if match.name else "unresolved_names")
+    print(match.describe())
+    resolved.append(match.name or name)
+  return resolved
+
+
+def resolve_base_item(index: ItemIndex | Catalogue, name: str,
+                      get_name_index: Optional[Callable[[], NameIndex]] = None) -> ItemProperties:
+  '''Find the normal item an LMS variant in lms_items_without_wiki_page is based on.
+  With get_name_index, a name that matches no item falls back to its confident fuzzy match.'''
+  attribute, value = base_item_key(name)
+  if attribute == "id":
+    return index.lookup_by_item_id(value)
+  try:
+    return index.lookup_by_item_name(value, attribute == "wiki_name")
+  except ValueError:
+    if get_name_index is None:
+      raise
+  match = get_name_index().resolve(value)
+  print(match.describe())
+  if match.name is None:
+    raise ValueError(f"Cannot find the provided item name... {match.describe()}")
+  metrics.count("fuzzy_name_matches")
+  try:
+    return index.lookup_by_item_name(match.name)
+  except ValueError:
+    return index.lookup_by_item_name(match.name, True)
+
+
+# --stream pipeline: every stage is a generator, so each item goes from raw record to written page before the next
+# record is read, and nothing but the pages still queued on the writer is held in memory.
+
+def stream_source(path: Optional[Path] = None) -> Iterator[dict]:
+  '''Raw item records, one at a time, in the file's (ascending id) order, from osrsreboxed's items-complete.json
+  unless path is given.'''
+  from osrsreboxed.items_api.all_items import PATH_TO_ITEMS_COMPLETE_JSON
+  from item_stream import iter_item_records
+
+  for record in iter_item_records(path or PATH_TO_ITEMS_COMPLETE_JSON):
+    metrics.count("items_scanned")
+    yield record
+
+
+def stream_match(records: Iterable[dict],
+                 overrides: dict[str, dict],
+                 lms_wiki_page_names: set[str]) -> Iterator[tuple[str, ItemProperties, LmsItem]]:
+  '''Pick the base item of every override out of records, first match by id like resolve_base_item.
+  Names of items that already have an LMS wiki page are added to lms_wiki_page_names along the way.
+  Raises ValueError once records run out if some override's base item never showed up.'''
+  from osrsreboxed.items_api.item_properties import ItemProperties
+
+  wanted = {}
+  for name in overrides:
+    attribute, value = base_item_key(name)
+    wanted[(attribute, value.lower() if isinstance(value, str) else value)] = name
+
+  for record in records:
+    wiki_name = record.get("wiki_name") or ""
+    if wiki_name and not record["duplicate"] and is_lms_wiki_name(wiki_name):
+      lms_wiki_page_names.add(record["name"])
+      metrics.count("items_matched")
+    keys = (("id", record["id"]), ("name", record["name"].lower()), ("wiki_name", wiki_name.lower()))
+    names = [wanted.pop(key) for key in keys if key in wanted]
+    if names:
+      original_item = ItemProperties.from_json(record)
+      for name in names:
+        yield name, original_item, LmsItem(**overrides[name])
+
+  if wanted:
+    raise ValueError(f"Cannot find the base items of: {', '.join(sorted(wanted.values()))}")
+
+
+def stream_build(matches: Iterable[tuple[str, ItemProperties, LmsItem]]) -> Iterator[ItemProperties]:
+  for name, original_item, lms_item in matches:
+    print(name)
+    with metrics.stage("create_lms_item"):
+      lms_object = create_lms_item(original_item, lms_item)
+    yield lms_object
+
+
+def stream_render(items: Iterable[ItemProperties],
+                  manifest: Optional[PageManifest] = None) -> Iterator[tuple[str, str, Optional[str]]]:
+  '''(page name, wikitext, wiki title) for every item whose page isn't already up to date in manifest.'''
+  from page_export import wiki_title
+
+  for item in items:
+    output = render_page(item, manifest)
+    if output is not None:
+      yield item.wiki_name, output, wiki_title(item.wiki_url)
+
+
+def stream_write(pages: Iterable[tuple[str, str, Optional[str]]], writer: PageWriter | ArchiveWriter) -> int:
+  written = 0
+  for page_name, output, title in pages:
+    with metrics.stage("write_queue"):
+      writer.submit(page_name, output, title)
+    written += 1
+  return written
+
+
+def run_stream_pipeline(manifest: Optional[PageManifest], writer: PageWriter | ArchiveWriter,
+                        overrides: dict[str, dict] = lms_items_without_wiki_page,
+                        path: Optional[Path] = None) -> set[str]:
+  '''source -> match -> build -> render -> write over overrides. Stops at the first failing item.
+  Returns the names of the items that already have an LMS wiki page.'''
+  lms_wiki_page_names: set[str] = set()
+  records = stream_source(path)
+  matches = stream_match(records, overrides, lms_wiki_page_names)
+  pages = stream_render(stream_build(matches), manifest)
+  stream_write(pages, writer)
+  return lms_wiki_page_names
+
+
+def load_overrides(path: Path | str) -> dict[str, dict]:
+  '''Read lms_items_without_wiki_page style overrides from a JSON file, first writing the built-in ones to it if
+  the file doesn't exist yet.'''
+  from page_writer import write_atomic
+
+  path = Path(path)
+  if not path.is_file():
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, json.dumps(lms_items_without_wiki_page, indent=2) + "\n", skip_unchanged=False)
+    print(f"Wrote the built-in overrides to {path}")
+  with open(path) as f:
+    return json.load(f)
+
+
+def watch_pages(index: ItemIndex | Catalogue,
+                overrides: dict[str, dict],
+                overrides_path: Optional[Path | str],
+                manifest: PageManifest,
+                page_names: dict[str, str],
+                get_name_index: Optional[Callable[[], NameIndex]] = None,
+                interval: float = 0.05):
+  '''Keep the item index and the compiled template in memory and re-render pages whenever the template directory
+  or the overrides file changes, until interrupted.
+  A template change re-renders every page, an overrides change only the entries that changed; page_names maps
+  override names to the pages rendered for them, so pages of removed entries can be deleted.'''
+  from file_watch import PollingWatcher
+
+  template_dir = Path(TEMPLATE_DIR)
+  watched = [template_dir] + ([Path(overrides_path)] if overrides_path else [])
+  watcher = PollingWatcher(watched, interval)
+  print(f"Watching {', '.join(str(path) for path in watched)} for changes, Ctrl-C to stop")
+  while True:
+    changed = watcher.wait()
+    start = time.perf_counter()
+    affected = set()
+    if overrides_path is not None and Path(overrides_path) in changed:
+      try:
+        new_overrides = load_overrides(overrides_path)
+      except (OSError, ValueError) as e:
+        print(f"Keeping the previous overrides, cannot read {overrides_path}: {e}")
+        new_overrides = overrides
+      affected |= {name for name, data in new_overrides.items() if overrides.get(name) != data}
+      for name in overrides.keys() - new_overrides.keys():
+        removed = manifest.remove(page_names.pop(name)) if name in page_names else None
+        print(f"Removed {removed or name}")
+      overrides = new_overrides
+    if any(path.parent == template_dir for path in changed):
+      affected |= overrides.keys()
+
+    jobs = []
+    for name, data in overrides.items():
+      if name not in affected:
+        continue
+      try:
+        jobs.append((name, resolve_base_item(index, name, get_name_index), LmsItem(**data)))
+      except (KeyError, ValueError, TypeError) as e:
+        print(f"Skipping {name}: {e!r}")
+    rendered_before = manifest.rendered
+    try:
+      page_names.update(zip([name for name, _, _ in jobs], render_all(jobs, manifest=manifest)))
+    except BatchRenderError as e:
+      print(e)
+    manifest.save()
+    print(f"{len(affected)} page(s) affected by {', '.join(sorted(str(path) for path in changed))}, "
+          f"{manifest.rendered - rendered_before} re-rendered in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+class LmsPageRenderer:
+  '''Renders the LMS page of one item on demand, for the render service.
+  An id or name of an entry in overrides builds the variant from its base item; any other id or name must belong
+  to an existing "(Last Man Standing)" item, which is rendered as it is.'''
+
+  def __init__(self, index: ItemIndex | Catalogue, overrides: dict[str, dict],
+               get_name_index: Optional[Callable[[], NameIndex]] = None):
+    self.index = index
+    self.overrides = overrides
+    self.get_name_index = get_name_index
+    self.names_by_id = {data["id"]: name for name, data in overrides.items()}
+    self.names_by_lower = {name.lower(): name for name in overrides}
+    # Catalogue lookups share one SQLite connection, and its item cache, between the server threads
+    self._lock = threading.Lock()
+
+  def _item(self, kind: str, value: str) -> ItemProperties:
+    if kind == "id":
+      item_id = int(value)
+      name = self.names_by_id.get(item_id)
+      if name is None:
+        item = self.index.lookup_by_item_id(item_id)
+        if not (item.wiki_name and is_lms_wiki_name(item.wiki_name)):
+          raise KeyError(f"{item.name} ({item_id}) is not a Last Man Standing item")
+        return item
+    elif kind == "name":
+      name = self.names_by_lower.get((LMS.base_name(value) or value).lower())
+      if name is None:
+        wiki_name = value if is_lms_wiki_name(value) else LMS.wiki_name(value)
+        try:
+          return self.index.lookup_by_item_name(wiki_name, True)
+        except ValueError:
+          raise KeyError(f"No Last Man Standing item named {wiki_name}")
+    else:
+      raise KeyError(f"Unknown lookup {kind!r}")
+    return create_lms_item(resolve_base_item(self.index, name, self.get_name_index), LmsItem(**self.overrides[name]))
+
+  def render(self, kind: str, value: str) -> str:
+    with self._lock:
+      item = self._item(kind, value)
+    return render_template(item)
+
+
+def serve_pages(renderer: LmsPageRenderer, address: str, cache_bytes: Optional[int] = None):
+  '''Serve rendered pages over HTTP on address ("[host:]port") until interrupted.'''
+  from render_service import DEFAULT_CACHE_BYTES, PageCache, RenderServer
+
+  if cache_bytes is None:
+    cache_bytes = DEFAULT_CACHE_BYTES
+  host, _, port = address.rpartition(":")
+  server = RenderServer((host or "127.0.0.1", int(port)), renderer.render, PageCache(cache_bytes))
+  print(f"Serving LMS pages on http://{server.server_address[0]}:{server.server_address[1]}/page/id/<id>, "
+        f"/page/name/<name> and /stats, Ctrl-C to stop")
+  try:
+    # create_lms_item and the render view print about every item, which a busy server can't afford
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+      server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+  print(f"Stopped serving, cache stats: {server.cache.stats()}")
+
+
+def check_wiki_pages(client: WikiClient, jobs: list[tuple[str, ItemProperties, LmsItem]],
+                     lms_wiki_pages: list[ItemProperties]) -> dict[str, list[str]]:
+  '''Ask the wiki which LMS pages really exist, instead of trusting the item data's wiki_name.
+  Returns the titles of pages this script would generate that already exist, and of items the data says have
+  an LMS page that doesn't exist.'''
+  from page_export import wiki_title
+
+  generated = {wiki_title(lms_wiki_url(original_item)) for _, original_item, _ in jobs}
+  documented = {wiki_title(item.wiki_url) for item in lms_wiki_pages if item.wiki_url}
+  start = time.perf_counter()
+  exists = client.pages_exist(sorted(generated | documented))
+  print(f"Checked {len(exists)} titles in {client.requests} requests in {time.perf_counter() - start:.3f}s")
+  return {
+    "generated_but_existing": sorted(title for title in generated if exists[title]),
+    "documented_but_missing": sorted(title for title in documented if not exists[title]),
+  }
+
+
+def fetch_overrides(fetcher: AsyncFetcher, jobs: list[tuple[str, ItemProperties, LmsItem]],
+                    wiki_url: Optional[str] = None) -> tuple[dict[str, dict], list[str]]:
+  '''Fetch the wiki page of every job's base item, on the OSRS wiki unless wiki_url is given, and read its Last
+  Man Standing infobox version.
+  Returns the overrides that could be read, by name, and a note for each one that couldn't.'''
+  from item_fetch import WIKI_URL, lms_overrides_from_infobox, parse_infobox_item, wiki_raw_url
+  from page_export import wiki_title
+
+  wiki_url = wiki_url or WIKI_URL
+  urls = {name: wiki_raw_url(wiki_title(original_item.wiki_url), wiki_url) for name, original_item, _ in jobs}
+  bodies = fetcher.fetch_all(list(urls.values()))
+  fetched, failures = {}, []
+  for name, url in urls.items():
+    body = bodies[url]
+    if isinstance(body, Exception):
+      failures.append(f"{name}: {body!r}")
+      continue
+    data = lms_overrides_from_infobox(parse_infobox_item(body.decode("utf-8")))
+    if data is None:
+      failures.append(f"{name}: no Last Man Standing version in the Infobox Item of {url}")
+      continue
+    LmsItem(**data)
+    fetched[name] = data
+  return fetched, failures
+
+
+def make_writer(args: argparse.Namespace) -> PageWriter | ArchiveWriter:
+  from page_export import ArchiveWriter
+  from page_writer import PageWriter
+
+  if args.export:
+    return ArchiveWriter(args.export)
+  return PageWriter(PAGE_OUTPUT_DIR, fsync=args.fsync)
+
+
+def load_manifest(args: argparse.Namespace) -> Optional[PageManifest]:
+  '''The page_outputs manifest, or None with --export, where every page goes into the archive.'''
+  from page_manifest import PageManifest
+
+  if args.export:
+    return None
+  return PageManifest(PAGE_OUTPUT_DIR) if args.force else PageManifest.load(PAGE_OUTPUT_DIR)
+
+
+def finish_run(args: argparse.Namespace, manifest: Optional[PageManifest], writer: PageWriter | ArchiveWriter,
+               profiler: Optional[cProfile.Profile] = None, completed: bool = True):
+  '''Orphan report, manifest save and --profile output, shared by the normal and --stream runs.
+  A run that didn't complete never prunes, the pages it didn't get to would look orphaned.'''
+  metrics.add_time("write (background)", writer.write_seconds, writer.pages_written + writer.pages_unchanged)
+  metrics.count("bytes_written", writer.bytes_written)
+  if manifest is None:
+    print(f"Exported {writer.pages_written} pages ({writer.bytes_written} bytes) to {args.export}")
   else:
-    original_item = items.lookup_by_item_name(name)
-  lms_item = create_lms_item(original_item, temp)
-  create_template(lms_item)
+    orphans = manifest.orphans()
+    if args.prune and not completed:
+      print(f"Not pruning {len(orphans)} orphaned page(s), the run stopped early")
+    elif args.prune:
+      for path in manifest.remove_orphans():
+        print(f"Removed orphaned page {path}")
+    else:
+      for path in orphans:
+        print(f"Orphaned page (not produced by this run, use --prune to remove): {path}")
+    manifest.save()
+    print(manifest.summary())
+
+  if args.profile:
+    print(metrics.table())
+    metrics.write_json(args.profile_output)
+    print(f"Profile report written to {args.profile_output}")
+  if profiler is not None:
+    profiler.dump_stats(args.profile_render)
+    print(f"Render stage cProfile stats written to {args.profile_render}")
+  if args.memory_budget is not None:
+    print(metrics.memory_table())
+    peak_mb = metrics.peak_memory() / (1024 * 1024)
+    if peak_mb > args.memory_budget:
+      raise SystemExit(f"Peak traced memory {peak_mb:.1f} MB is over the --memory-budget of {args.memory_budget:g} MB")
+
+
+COMMANDS = ("render", "find", "diff", "missing")
+
+
+def catalogue_path(value: str | bool) -> str:
+  '''--catalogue and --export-catalogue given without a file name mean the default catalogue in ./.cache.'''
+  from item_catalogue import CATALOGUE_PATH
+
+  return CATALOGUE_PATH if value is True else value
+
+
+def load_index(args: argparse.Namespace) -> tuple[ItemIndex | Catalogue, dict[str, dict]]:
+  '''The item index the command works on, or the --catalogue, and the LMS overrides.'''
+  overrides = load_overrides(args.overrides) if args.overrides else lms_items_without_wiki_page
+  if args.catalogue:
+    from item_catalogue import Catalogue
+
+    # lookups go straight to the SQLite file, the item database is never loaded
+    with metrics.stage("load"):
+      index = Catalogue(catalogue_path(args.catalogue))
+      if not args.overrides:
+        overrides = index.overrides()
+    return index, overrides
+
+  from item_index import ItemIndex
+
+  with metrics.stage("load"):
+    items = load_lms_items(projection=args.projection, use_cache=not args.no_cache, overrides=overrides)
+  metrics.count("items_scanned", len(items))
+  with metrics.stage("index"):
+    index = ItemIndex(items)
+  # the index holds its own list of the items, the AllItems container and its lookup tables can go
+  del items
+  return index, overrides
+
+
+def name_index_loader(args: argparse.Namespace, index: ItemIndex | Catalogue) -> Callable[[], NameIndex]:
+  '''Memoized loader of the fuzzy name index over index, which is only built once some lookup needs it.'''
+  from item_cache import snapshot_key
+  from name_index import load_name_index
+
+  # the trigram index is prebuilt in ./.cache per item database, a projection only holds some of the names
+  key = None if args.projection else (index.source_key() if args.catalogue else snapshot_key())
+  # it resolves base items, a fuzzy match must never land on a variant like "Dragon knife (Last Man Standing)"
+  return lru_cache(maxsize=None)(partial(load_name_index, index.names, key, exclude=marker_pattern(VARIANTS.values())))
+
+
+def match_wiki_pages(index: ItemIndex | Catalogue) -> dict[str, list[ItemProperties]]:
+  # Get list of all existing wiki pages for LMS items, and for the other variants in the same pass
+  with metrics.stage("match"):
+    variant_wiki_pages = get_variant_wiki_pages(index, VARIANTS.values())
+  for key, wiki_pages in variant_wiki_pages.items():
+    metrics.count("items_matched", len(wiki_pages))
+    print(f"Number of {key} items with wiki pages: ", len(wiki_pages))
+  # pprinter.pprint(lms_wiki_pages)
+  # print_only_attr(lms_wiki_pages, "name")
+  return variant_wiki_pages
+
+
+def cmd_find(args: argparse.Namespace):
+  from item_catalogue import Catalogue
+
+  index = Catalogue(catalogue_path(args.catalogue))
+  for item in index.search(args.query):
+    print(f"{item.id:>6}  {item.name}  [{item.wiki_name}]")
+
+
+def cmd_diff(args: argparse.Namespace):
+  from item_diff import diff_pairs, diff_table, variant_pairs, write_diff_json
+
+  index, _ = load_index(args)
+
+  # compare_items(23605, 21795, items)  # imbued zammy cape
+  # compare_items(9243, 23649, items)   # diamond bolts (e)
+  # compare_items(7462, 23593, items)   # barrows gloves
+
+  with metrics.stage("diff"):
+    diffs = diff_pairs(variant_pairs(index.wiki_name_contains("") if args.catalogue else index, LMS))
+  print(diff_table(diffs))
+  if args.output:
+    write_diff_json(diffs, args.output)
+    print(f"Diff report written to {args.output}")
+
+
+def cmd_missing(args: argparse.Namespace):
+  index, _ = load_index(args)
+
+  # cut this list down to only the normal version of each item and store in lms_items
+  # get_all_matching_items(index, lms_item_names)
+
+  # ad hoc search for items when item issues arise
+  # get_all_matching_items(index, ["Opal dragon bolts"])
+
+  lms_wiki_pages = match_wiki_pages(index)[LMS.key]
+  with metrics.stage("resolve_names"):
+    lms_names = resolve_lms_item_names(index, lms_item_names, name_index_loader(args, index))
+  with metrics.stage("missing_pages"):
+    missing_lms_wiki_pages = get_missing_lms_wiki_pages(lms_wiki_pages, lms_names)
+  print("Number of lms items without wiki pages: ", len(missing_lms_wiki_pages))
+  print("lms items without wiki pages:\n", pformat(missing_lms_wiki_pages))
+
+  if args.navbox:
+    from page_writer import write_atomic
+    from reconcile import NAVBOX_URL, navbox_names, reconcile
+
+    try:
+      navbox = navbox_names(Path(args.navbox).read_text(encoding="utf-8"), LMS)
+    except FileNotFoundError:
+      raise SystemExit(f"{args.navbox} not found, save the navbox wikitext from {NAVBOX_URL}?action=raw")
+    with metrics.stage("reconcile"):
+      reconciliation = reconcile(lms_names, lms_wiki_pages, navbox, LMS)
+    write_atomic(args.report, reconciliation.to_markdown(), skip_unchanged=False)
+    print(f"Missing from the navbox: {len(reconciliation.missing_from_navbox)}, "
+          f"navbox redlinks: {len(reconciliation.navbox_redlinks)}, "
+          f"without a wiki page: {len(reconciliation.missing_wiki_pages)}, "
+          f"not in lms_item_names: {len(reconciliation.not_in_item_list)}, "
+          f"duplicates: {sum(map(len, reconciliation.duplicates.values()))}")
+    print(f"Reconciliation report written to {args.report}")
+
+
+def cmd_render(args: argparse.Namespace):
+  if args.stream:
+    # the stream pipeline reads items-complete.json itself and renders in-process, none of these apply to it
+    conflicting = [option for option, given in [("--watch", args.watch), ("--serve", args.serve),
+                                                 ("--catalogue", args.catalogue), ("--workers", args.workers > 1),
+                                                 ("--check-wiki", args.check_wiki),
+                                                 ("--fetch-overrides", args.fetch_overrides),
+                                                 ("--export-catalogue", args.export_catalogue),
+                                                 ("--profile-render", args.profile_render)] if given]
+    if conflicting:
+      args.error(f"{', '.join(conflicting)} can't be combined with --stream")
+
+  if args.export:
+    # checked before anything is loaded, ArchiveWriter would only fail once every page is resolved
+    from page_export import export_format, zstandard
+
+    try:
+      fmt = export_format(args.export)
+    except ValueError as e:
+      args.error(str(e))
+    if fmt == "tar.zst" and zstandard is None:
+      args.error("--export to .tar.zst needs zstandard, install it with `pip install zstandard`")
+  if args.export and (args.watch or args.serve):
+    args.error("--export can't be combined with --watch or --serve")
+  if args.export and args.workers > 1 and args.executor == "process":
+    args.error("--export with --workers > 1 needs --executor thread, process workers write their own files")
+  if args.fsync and args.workers > 1 and args.executor == "process":
+    args.error("--fsync with --workers > 1 needs --executor thread, process workers write their own files unsynced")
+
+  set_fast_render(args.fast_render)
+
+  if args.memory_budget is not None:
+    if args.watch or args.serve:
+      args.error("--memory-budget can't be combined with --watch or --serve, they keep the items loaded")
+    args.projection = True
+    metrics.trace_memory()
+
+  if args.stream:
+    manifest = load_manifest(args)
+    writer = make_writer(args)
+    completed = False
+    try:
+      with metrics.stage("stream_pipeline"), writer:
+        lms_wiki_page_names = run_stream_pipeline(
+            manifest, writer, load_overrides(args.overrides) if args.overrides else lms_items_without_wiki_page)
+      completed = True
+      print("Number of lms items with wiki pages: ", metrics.counters["items_matched"])
+      print("Number of lms item names with wiki pages: ", len(lms_wiki_page_names))
+    finally:
+      finish_run(args, manifest, writer, completed=completed)
+    return
+
+  if args.export_catalogue:
+    from item_cache import snapshot_key
+    from item_catalogue import export_catalogue
+
+    items = load_lms_items(use_cache=not args.no_cache)
+    overrides = load_overrides(args.overrides) if args.overrides else lms_items_without_wiki_page
+    export_catalogue(items, overrides, catalogue_path(args.export_catalogue), source_key=snapshot_key())
+    return
+
+  index, overrides = load_index(args)
+  get_name_index = name_index_loader(args, index)
+
+  if args.serve:
+    serve_pages(LmsPageRenderer(index, overrides, get_name_index), args.serve,
+                args.cache_mb * 1024 * 1024 if args.cache_mb is not None else None)
+    return
+
+  # the items without a wiki page are listed by the missing command
+  variant_wiki_pages = match_wiki_pages(index)
+  lms_wiki_pages = variant_wiki_pages[LMS.key]
+
+  manifest = load_manifest(args)
+  variant_jobs = {}
+  with metrics.stage("resolve_base_items"):
+    for variant in VARIANTS.values():
+      variant_overrides = overrides if variant is LMS else variant.overrides
+      if variant_overrides and variant.template_name is None:
+        print(f"Skipping {len(variant_overrides)} {variant.key} overrides, the variant has no template")
+        continue
+      variant_jobs[variant.key] = []
+      for name, data in variant_overrides.items():
+        print(name)
+        variant_jobs[variant.key].append((name, resolve_base_item(index, name, get_name_index), LmsItem(**data)))
+  # --fetch-overrides, --check-wiki and --watch only know about LMS
+  jobs = variant_jobs[LMS.key]
+
+  if args.memory_budget is not None:
+    # from here on only the jobs' base items are needed, not the index over everything that was loaded
+    get_name_index.cache_clear()
+    del index, get_name_index, variant_wiki_pages
+
+  if args.fetch_overrides:
+    from item_fetch import DEFAULT_TTL, AsyncFetcher
+    from page_writer import write_atomic
+
+    fetcher = AsyncFetcher(ttl=args.http_cache_ttl if args.http_cache_ttl is not None else DEFAULT_TTL)
+    fetched, failures = fetch_overrides(fetcher, jobs, args.wiki_url)
+    for failure in failures:
+      print(f"Keeping the current override for {failure}")
+    # unfetched entries keep their current data
+    write_atomic(args.fetch_overrides, json.dumps({**overrides, **fetched}, indent=2) + "\n", skip_unchanged=False)
+    print(f"Fetched {len(fetched)} of {len(jobs)} overrides into {args.fetch_overrides}: "
+          f"{fetcher.network_requests} network requests, {fetcher.cache_hits} from cache, {fetcher.not_modified} not modified")
+    return
+
+  if args.check_wiki:
+    from wiki_api import WIKI_API_URL, WikiClient
+
+    with WikiClient(args.wiki_api or WIKI_API_URL) as client:
+      report = check_wiki_pages(client, jobs, lms_wiki_pages)
+    print("Pages generated as missing that already exist on the wiki:", *report["generated_but_existing"], sep="\n  ")
+    print("Items with a Last Man Standing wiki_name whose page doesn't exist:", *report["documented_but_missing"],
+          sep="\n  ")
+    return
+
+  if args.profile_render:
+    import cProfile
+
+    profiler = cProfile.Profile()
+  else:
+    profiler = None
+  writer = make_writer(args)
+  page_names = {}
+  try:
+    with metrics.stage("render_all"), writer:
+      if profiler is not None:
+        profiler.enable()
+      errors = []
+      try:
+        for key, variant_job_list in variant_jobs.items():
+          if not variant_job_list:
+            continue
+          try:
+            rendered = render_all(variant_job_list, workers=args.workers, executor=args.executor, manifest=manifest,
+                                  writer=writer, variant=VARIANTS[key])
+          except BatchRenderError as e:
+            errors.extend(e.errors)
+            continue
+          if key == LMS.key:
+            page_names = dict(zip([name for name, _, _ in variant_job_list], rendered))
+      finally:
+        if profiler is not None:
+          profiler.disable()
+      if errors:
+        # a broken template or override is exactly what --watch is there to fix
+        if not args.watch:
+          raise BatchRenderError(errors)
+        print(BatchRenderError(errors))
+  finally:
+    # pages that rendered fine are still recorded when other pages failed
+    finish_run(args, manifest, writer, profiler)
+
+  if args.watch:
+    try:
+      watch_pages(index, overrides, args.overrides, manifest, page_names, get_name_index, args.poll_interval)
+    except KeyboardInterrupt:
+      manifest.save()
+      print("Stopped watching")
+
+
+def add_load_arguments(parser: argparse.ArgumentParser):
+  '''Where the item data comes from, shared by the commands that read it.'''
+  parser.add_argument("--projection", action="store_true",
+                      help="stream items-complete.json and only build the items used by this script")
+  parser.add_argument("--no-cache", action="store_true", help="skip the ./.cache item database snapshot")
+  parser.add_argument("--catalogue", metavar="SQLITE_FILE", nargs="?", const=True,
+                      help="read items and overrides from a catalogue written by --export-catalogue instead of loading "
+                           "the item database, ./.cache/items.sqlite if no file is given")
+  parser.add_argument("--overrides", metavar="JSON_FILE",
+                      help="read the LMS overrides from a JSON file instead of lms_items_without_wiki_page, created from it if missing")
+
+
+def build_parser() -> argparse.ArgumentParser:
+  # the defaults that live in modules built on osrsreboxed are filled in by the commands, so parsing stays cheap
+  import argparse
+
+  parser = argparse.ArgumentParser(description="Create wikitext pages for Last Man Standing item variants.",
+                                   epilog="Without a command the render options can be given on their own, "
+                                          "e.g. `create_lms_page.py --force`.")
+  commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+  render = commands.add_parser("render", help="render the variant pages into page_outputs (the default command)")
+  render.set_defaults(run=cmd_render, error=render.error)
+  add_load_arguments(render)
+  render.add_argument("--force", action="store_true", help="render every page even if page_outputs/manifest.json says it is unchanged")
+  render.add_argument("--prune", action="store_true", help="delete orphaned pages in page_outputs that this run didn't produce")
+  render.add_argument("--workers", type=int, default=1, help="number of render workers, 1 renders in-process")
+  render.add_argument("--executor", choices=["process", "thread"], default="process", help="pool type used when --workers > 1")
+  render.add_argument("--fast-render", action="store_true",
+                      help="render through a Python function generated from the template instead of Jinja, "
+                           "falling back to Jinja for pages it can't render")
+  render.add_argument("--fsync", action="store_true", help="fsync every written page in one batch before finishing")
+  render.add_argument("--stream", action="store_true",
+                      help="run as a generator pipeline straight from items-complete.json, one item at a time, with flat memory use")
+  render.add_argument("--check-wiki", action="store_true",
+                      help="check which LMS pages exist on the wiki through its API instead of rendering, see wiki_stub.py for offline use")
+  render.add_argument("--wiki-api", help="api.php URL used by --check-wiki, the OSRS wiki's by default")
+  render.add_argument("--fetch-overrides", metavar="JSON_FILE",
+                      help="read each override's Last Man Standing infobox version from the wiki page of its base item "
+                           "and write the overrides to JSON_FILE, for use with --overrides")
+  render.add_argument("--wiki-url", help="wiki base URL used by --fetch-overrides, the OSRS wiki by default")
+  render.add_argument("--http-cache-ttl", type=float,
+                      help="seconds a --fetch-overrides response is served from ./.cache/http before it is revalidated, "
+                           "a day by default")
+  render.add_argument("--export", metavar="ARCHIVE",
+                      help="write every page into one archive instead of page_outputs: .xml (MediaWiki import dump), "
+                           ".jsonl, .tar, .tar.gz or .tar.zst")
+  render.add_argument("--watch", action="store_true",
+                      help="after rendering, keep the items loaded and re-render pages when the templates or --overrides file change")
+  render.add_argument("--poll-interval", type=float, default=0.05, help="seconds between --watch polls")
+  render.add_argument("--serve", metavar="[HOST:]PORT",
+                      help="keep the items loaded and serve rendered pages over HTTP instead of writing them")
+  render.add_argument("--cache-mb", type=int, help="size of the --serve page cache in MB, 64 by default")
+  render.add_argument("--export-catalogue", metavar="SQLITE_FILE", nargs="?", const=True,
+                      help="write the item database and the LMS overrides to a SQLite catalogue and exit")
+  render.add_argument("--memory-budget", metavar="MB", type=float,
+                      help="low-memory run: project only the needed items, drop them once the base items are resolved, "
+                           "report tracemalloc peak and top allocators per stage, and fail if the peak exceeds MB")
+  render.add_argument("--profile", action="store_true", help="print per-stage timings and counters and write them as JSON")
+  render.add_argument("--profile-output", default="./profile_report.json", help="JSON report path for --profile")
+  render.add_argument("--profile-render", metavar="PSTATS_FILE",
+                      help="dump cProfile stats of the render stage; cProfile only sees the main thread, so use with --workers 1")
+
+  find = commands.add_parser("find", help="full-text search item names in the catalogue")
+  find.set_defaults(run=cmd_find)
+  find.add_argument("query")
+  find.add_argument("--catalogue", metavar="SQLITE_FILE", default=True,
+                    help="catalogue written by render --export-catalogue, ./.cache/items.sqlite by default")
+
+  diff = commands.add_parser("diff", help="diff every existing LMS variant against its base item")
+  diff.set_defaults(run=cmd_diff)
+  add_load_arguments(diff)
+  diff.add_argument("--output", metavar="JSON_FILE", help="also write the report as JSON")
+
+  missing = commands.add_parser("missing", help="list lms_item_names without an LMS wiki page")
+  missing.set_defaults(run=cmd_missing)
+  add_load_arguments(missing)
+  missing.add_argument("--navbox", metavar="NAVBOX_FILE",
+                       help="also reconcile lms_item_names and the LMS wiki pages with a saved copy of the in-game items "
+                            "navbox wikitext (Template:Last_Man_Standing_in-game_items?action=raw) and write the --report")
+  missing.add_argument("--report", default="./missing_items.generated.md",
+                       help="report path for --navbox, missing_items.md holds the hand-kept notes")
+  return parser
+
+
+def main(argv: Optional[list[str]] = None):
+  import sys
+
+  argv = sys.argv[1:] if argv is None else list(argv)
+  # render used to be the only thing this script did, its options still work without naming it
+  if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+    argv = ["render", *argv]
+  args = build_parser().parse_args(argv)
+  args.run(args)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,153 @@
+'''Code-generated fast path for the page templates.
+
+compile_source parses a template with Jinja's own parser, so whitespace control, {% raw %} blocks and the dropped
+trailing newline come out exactly as Jinja has them, and turns the small subset of Jinja the page templates use
+into one plain Python function: literal text as pre-split string constants, {{ expressions }} as attribute
+access and str(), {% if %} blocks inlined as Python ifs, and the page assembled with a single "".join.
+
+A template using anything outside that subset raises UnsupportedTemplate, and FastTemplate keeps rendering it
+with Jinja. A page the generated function raises on, e.g. an attribute of a missing equipment object that Jinja
+renders as undefined, is rendered with Jinja as well, so the output is always Jinja's.
+'''
+
+from typing import Callable, Iterable, Optional
+
+from jinja2 import Environment, nodes
+
+from metrics import metrics
+
+_COMPARE_OPS = {"eq": "==", "ne": "!=", "gt": ">", "gteq": ">=", "lt": "<", "lteq": "<=", "in": "in", "notin": "not in"}
+
+
+class UnsupportedTemplate(Exception):
+  pass
+
+
+class _CodeGenerator:
+  def __init__(self, context_names: Iterable[str]):
+    self.context_names = set(context_names)
+    self.lines: list[str] = []
+
+  def expr(self, node: nodes.Expr) -> str:
+    if isinstance(node, nodes.Const):
+      return repr(node.value)
+    if isinstance(node, nodes.Name) and node.ctx == "load" and node.name in self.context_names:
+      return node.name
+    if isinstance(node, nodes.Getattr):
+      return f"{self.expr(node.node)}.{node.attr}"
+    if isinstance(node, nodes.Getitem):
+      return f"{self.expr(node.node)}[{self.expr(node.arg)}]"
+    if isinstance(node, nodes.Call) and not (node.kwargs or node.dyn_args or node.dyn_kwargs):
+      return f"{self.expr(node.node)}({', '.join(self.expr(arg) for arg in node.args)})"
+    if isinstance(node, nodes.Compare) and all(op.op in _COMPARE_OPS for op in node.ops):
+      return "(" + self.expr(node.expr) + "".join(f" {_COMPARE_OPS[op.op]} {self.expr(op.expr)}" for op in node.ops) + ")"
+    if isinstance(node, nodes.And):
+      return f"({self.expr(node.left)} and {self.expr(node.right)})"
+    if isinstance(node, nodes.Or):
+      return f"({self.expr(node.left)} or {self.expr(node.right)})"
+    if isinstance(node, nodes.Not):
+      return f"(not {self.expr(node.node)})"
+    if isinstance(node, (nodes.List, nodes.Tuple)):
+      items = ", ".join(self.expr(item) for item in node.items)
+      return f"[{items}]" if isinstance(node, nodes.List) else f"({items},)"
+    raise UnsupportedTemplate(f"{type(node).__name__} on line {node.lineno}")
+
+  def flush(self, pending: list[tuple[bool, str]], indent: str) -> bool:
+    '''Emit a run of output, adjacent literals merged into one constant. Returns whether anything was emitted.'''
+    parts = []
+    for is_literal, value in pending:
+      if is_literal and parts and parts[-1][0]:
+        parts[-1] = (True, parts[-1][1] + value)
+      else:
+        parts.append((is_literal, value))
+    pending.clear()
+    if not parts:
+      return False
+    code = [repr(value) if is_literal else value for is_literal, value in parts]
+    self.lines.append(f"{indent}append({code[0]})" if len(code) == 1 else f"{indent}extend(({', '.join(code)},))")
+    return True
+
+  def block(self, body: list[nodes.Node], indent: str):
+    pending: list[tuple[bool, str]] = []
+    emitted = False
+    for node in body:
+      if isinstance(node, nodes.Output):
+        for child in node.nodes:
+          if isinstance(child, nodes.TemplateData):
+            pending.append((True, child.data))
+          elif isinstance(child, nodes.Const):
+            pending.append((True, str(child.value)))
+          else:
+            pending.append((False, f"str({self.expr(child)})"))
+      elif isinstance(node, nodes.If):
+        emitted |= self.flush(pending, indent)
+        self.lines.append(f"{indent}if {self.expr(node.test)}:")
+        self.block(node.body, indent + "  ")
+        for elif_ in node.elif_:
+          self.lines.append(f"{indent}elif {self.expr(elif_.test)}:")
+          self.block(elif_.body, indent + "  ")
+        if node.else_:
+          self.lines.append(f"{indent}else:")
+          self.block(node.else_, indent + "  ")
+        emitted = True
+      else:
+        raise UnsupportedTemplate(f"{type(node).__name__} on line {node.lineno}")
+    emitted |= self.flush(pending, indent)
+    if not emitted:
+      self.lines.append(f"{indent}pass")
+
+
+def generate_source(env: Environment, source: str, context_names: Iterable[str] = ("item",)) -> str:
+  '''Python source of a `render(<context_names>)` function equivalent to the template source.'''
+  if env.autoescape or env.finalize is not None:
+    raise UnsupportedTemplate("autoescape and finalize aren't supported")
+  context_names = list(context_names)
+  generator = _CodeGenerator(context_names)
+  generator.block(env.parse(source).body, "  ")
+  return "\n".join([f"def render({', '.join(context_names)}):",
+                    "  parts = []",
+                    "  append = parts.append",
+                    "  extend = parts.extend",
+                    *generator.lines,
+                    "  return ''.join(parts)",
+                    ""])
+
+
+def compile_source(env: Environment, source: str, name: str = "<template>",
+                   context_names: Iterable[str] = ("item",)) -> Callable[..., str]:
+  code = generate_source(env, source, context_names)
+  namespace = {}
+  exec(compile(code, f"<fast template {name}>", "exec"), namespace)
+  render = namespace["render"]
+  render.source = code
+  return render
+
+
+class FastTemplate:
+  '''Renders template_name through its generated function, and through Jinja when the template isn't supported or
+  the function raises. Regenerated when the template file changes, the same check Jinja's auto_reload does.'''
+
+  def __init__(self, env: Environment, template_name: str):
+    self.env = env
+    self.template_name = template_name
+    self.function: Optional[Callable[..., str]] = None
+    self._uptodate: Optional[Callable[[], bool]] = None
+    self._load()
+
+  def _load(self):
+    source, _, self._uptodate = self.env.loader.get_source(self.env, self.template_name)
+    try:
+      self.function = compile_source(self.env, source, self.template_name)
+    except UnsupportedTemplate as e:
+      print(f"Rendering {self.template_name} with Jinja, the fast renderer doesn't support it: {e}")
+      self.function = None
+
+  def render(self, item) -> str:
+    if self._uptodate is not None and not self._uptodate():
+      self._load()
+    if self.function is not None:
+      try:
+        return self.function(item)
+      except Exception:
+        metrics.count("fast_render_fallbacks")
+    return self.env.get_template(self.template_name).render(item=item)
@@ -0,0 +1,58 @@
+'''Polling file watcher for --watch mode.
+
+Compares the inode, size and mtime of every watched file between polls. Polling needs no extra dependency,
+works the same on every platform, and at a few files costs microseconds per poll. An editor's save through
+a temp file and a rename shows up as a changed inode.
+'''
+
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+
+
+def _signature(path: Path) -> Optional[tuple[int, int, int]]:
+  try:
+    stat = os.stat(path)
+  except FileNotFoundError:
+    return None
+  return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class PollingWatcher:
+  '''Watches files, and the files directly inside directories (hidden ones excluded), for changes.'''
+
+  def __init__(self, paths: Iterable[Path | str], interval: float = 0.05):
+    self.paths = [Path(path) for path in paths]
+    self.interval = interval
+    self._snapshot = self._scan()
+
+  def _files(self) -> list[Path]:
+    files = []
+    for path in self.paths:
+      if path.is_dir():
+        files.extend(child for child in path.iterdir() if child.is_file() and not child.name.startswith("."))
+      else:
+        files.append(path)
+    return files
+
+  def _scan(self) -> dict[Path, Optional[tuple[int, int, int]]]:
+    return {path: _signature(path) for path in self._files()}
+
+  def changes(self) -> set[Path]:
+    '''Files created, modified or deleted since the last call.'''
+    snapshot = self._scan()
+    changed = {path for path in snapshot.keys() | self._snapshot.keys()
+               if snapshot.get(path) != self._snapshot.get(path)}
+    self._snapshot = snapshot
+    return changed
+
+  def wait(self, stop: Optional[threading.Event] = None) -> set[Path]:
+    '''Block until something changes and return what did, or an empty set once stop is set.'''
+    stop = stop or threading.Event()
+    while not stop.is_set():
+      changed = self.changes()
+      if changed:
+        return changed
+      stop.wait(self.interval)
+    return set()
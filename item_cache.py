@@ -0,0 +1,109 @@
+'''On-disk snapshot cache for the osrsreboxed item database.
+
+items_api.load() decodes the whole items-complete.json and rebuilds every ItemProperties object on every run.
+The snapshot stores the already built item list as a plain, uncompressed pickle next to the script, keyed on the
+installed osrsreboxed version and the size/mtime of the JSON file, so a package upgrade invalidates it
+automatically. Loading it still builds every item, it only skips the JSON decoding and the per-item from_json().
+'''
+
+import gc
+import hashlib
+import os
+import pickle
+import time
+from importlib import metadata
+from pathlib import Path
+
+from osrsreboxed import items_api
+from osrsreboxed.items_api.all_items import AllItems, PATH_TO_ITEMS_COMPLETE_JSON
+
+from cache_paths import CACHE_DIR
+from metrics import metrics
+
+SNAPSHOT_PREFIX = "items-snapshot-"
+SNAPSHOT_SUFFIX = ".pickle"
+
+
+def snapshot_key(source: Path = PATH_TO_ITEMS_COMPLETE_JSON) -> str:
+  '''Build the cache key from the osrsreboxed version and the stat of the item database file.'''
+  try:
+    version = metadata.version("osrsreboxed")
+  except metadata.PackageNotFoundError:
+    version = "unknown"
+  stat = os.stat(source)
+  digest = hashlib.sha1(f"{Path(source).resolve()}|{stat.st_size}|{stat.st_mtime_ns}".encode()).hexdigest()[:12]
+  return f"{version}-{digest}"
+
+
+def snapshot_path(key: str, cache_dir: Path = CACHE_DIR) -> Path:
+  return Path(cache_dir) / f"{SNAPSHOT_PREFIX}{key}{SNAPSHOT_SUFFIX}"
+
+
+def items_from_list(all_items: list) -> AllItems:
+  '''Rebuild an AllItems object around an already loaded item list, skipping the JSON parsing in __init__.'''
+  items = AllItems.__new__(AllItems)
+  items.all_items = all_items
+  items.all_items_dict = {item.id: item for item in all_items}
+  return items
+
+
+def read_snapshot(path: Path) -> AllItems:
+  '''Unpickle a snapshot into an AllItems object.'''
+  # the unpickler creates hundreds of thousands of objects, pausing the gc avoids repeated useless collections
+  gc_was_enabled = gc.isenabled()
+  gc.disable()
+  try:
+    with open(path, "rb") as f:
+      all_items = pickle.load(f)
+  finally:
+    if gc_was_enabled:
+      gc.enable()
+  return items_from_list(all_items)
+
+
+def write_snapshot(items: AllItems, path: Path):
+  '''Write the snapshot to a temp file first so an interrupted run never leaves a truncated snapshot behind.'''
+  path.parent.mkdir(parents=True, exist_ok=True)
+  tmp_path = path.with_suffix(path.suffix + ".tmp")
+  with open(tmp_path, "wb") as f:
+    pickle.dump(items.all_items, f, protocol=pickle.HIGHEST_PROTOCOL)
+  os.replace(tmp_path, path)
+
+
+def remove_stale_snapshots(keep: Path, cache_dir: Path = CACHE_DIR) -> list[Path]:
+  '''Delete snapshots built from a previous osrsreboxed install.'''
+  removed = []
+  for path in Path(cache_dir).glob(f"{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}"):
+    if path != keep:
+      path.unlink()
+      removed.append(path)
+  return removed
+
+
+def load_items(use_cache: bool = True, cache_dir: Path = CACHE_DIR) -> AllItems:
+  '''Drop-in replacement for items_api.load() that reads from and maintains the snapshot cache.'''
+  start = time.perf_counter()
+  if not use_cache:
+    items = items_api.load()
+    print(f"Loaded {len(items)} items from items-complete.json in {time.perf_counter() - start:.3f}s (cache disabled)")
+    return items
+
+  path = snapshot_path(snapshot_key(), cache_dir)
+  if path.is_file():
+    try:
+      items = read_snapshot(path)
+      metrics.count("snapshot_cache_hits")
+      print(f"Loaded {len(items)} items from snapshot {path.name} in {time.perf_counter() - start:.3f}s (warm)")
+      return items
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError) as e:
+      print(f"Ignoring unreadable snapshot {path}: {e}")
+
+  metrics.count("snapshot_cache_misses")
+  items = items_api.load()
+  load_time = time.perf_counter() - start
+  write_snapshot(items, path)
+  for stale in remove_stale_snapshots(path, cache_dir):
+    print(f"Removed stale snapshot {stale.name}")
+  print(f"Loaded {len(items)} items from items-complete.json in {load_time:.3f}s (cold), "
+        f"snapshot written to {path} in {time.perf_counter() - start - load_time:.3f}s")
+  return items
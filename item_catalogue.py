@@ -0,0 +1,185 @@
+'''SQLite catalogue of the item database and the LMS overrides.
+
+export_catalogue() writes every item as a JSON row, with indexes on id, name and wiki_name and an FTS5 table
+over the names, plus the lms_items_without_wiki_page overrides. Catalogue answers the same lookups as
+ItemIndex straight from the file, building only the items a query returns, so a run or an ad hoc lookup
+never has to load the whole item database.
+'''
+
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable
+
+from osrsreboxed.items_api.item_properties import ItemProperties
+
+from cache_paths import CACHE_DIR
+
+CATALOGUE_PATH = CACHE_DIR / "items.sqlite"
+
+SCHEMA = '''
+CREATE TABLE items (
+  id INTEGER PRIMARY KEY,
+  name TEXT NOT NULL,
+  wiki_name TEXT,
+  duplicate INTEGER NOT NULL,
+  data TEXT NOT NULL
+);
+CREATE INDEX items_name ON items (name COLLATE NOCASE);
+CREATE INDEX items_wiki_name ON items (wiki_name COLLATE NOCASE);
+CREATE TABLE overrides (
+  name TEXT PRIMARY KEY,
+  data TEXT NOT NULL
+);
+CREATE TABLE meta (
+  key TEXT PRIMARY KEY,
+  value TEXT
+);
+'''
+FTS_SCHEMA = '''
+CREATE VIRTUAL TABLE items_fts USING fts5(name, wiki_name, content='items', content_rowid='id');
+INSERT INTO items_fts (items_fts) VALUES ('rebuild');
+'''
+
+
+def has_fts5() -> bool:
+  '''Whether this Python's SQLite was built with FTS5; search() falls back to LIKE without it.'''
+  try:
+    sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE fts_check USING fts5(text)")
+  except sqlite3.OperationalError:
+    return False
+  return True
+
+
+def _item_json(item: ItemProperties) -> str:
+  # nested ItemEquipment/ItemWeapon serialize to the same shape as in items-complete.json, so from_json reads them back
+  return json.dumps(item, default=vars, separators=(",", ":"))
+
+
+def export_catalogue(items: Iterable[ItemProperties], overrides: dict[str, dict],
+                     path: Path | str = CATALOGUE_PATH, source_key: str | None = None) -> Path:
+  '''Write items and overrides to a fresh catalogue file, replacing path atomically.'''
+  start = time.perf_counter()
+  path = Path(path)
+  path.parent.mkdir(parents=True, exist_ok=True)
+  tmp_path = path.with_suffix(path.suffix + ".tmp")
+  tmp_path.unlink(missing_ok=True)
+  conn = sqlite3.connect(tmp_path)
+  try:
+    with conn:
+      conn.executescript(SCHEMA)
+      conn.executemany("INSERT INTO items VALUES (?, ?, ?, ?, ?)",
+                       ((item.id, item.name, item.wiki_name, item.duplicate, _item_json(item)) for item in items))
+      conn.executemany("INSERT INTO overrides VALUES (?, ?)",
+                       ((name, json.dumps(data)) for name, data in overrides.items()))
+      conn.execute("INSERT INTO meta VALUES ('source_key', ?)", (source_key,))
+      if has_fts5():
+        conn.executescript(FTS_SCHEMA)
+  finally:
+    conn.close()
+  os.replace(tmp_path, path)
+  print(f"Exported item catalogue to {path} in {time.perf_counter() - start:.3f}s")
+  return path
+
+
+class Catalogue:
+  '''Read-only lookups against a catalogue file, with the same contracts as ItemIndex.'''
+
+  def __init__(self, path: Path | str = CATALOGUE_PATH):
+    path = Path(path)
+    if not path.is_file():
+      raise FileNotFoundError(f"No item catalogue at {path}, create it with --export-catalogue")
+    self.path = path
+    self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    self.has_fts = self.conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'items_fts'").fetchone() is not None
+    self._items: dict[int, ItemProperties] = {}
+
+  def __enter__(self) -> 'Catalogue':
+    return self
+
+  def __exit__(self, exc_type, exc, tb):
+    self.close()
+
+  def close(self):
+    self.conn.close()
+
+  def __len__(self) -> int:
+    return self.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+  def _build(self, item_id: int, data: str) -> ItemProperties:
+    item = self._items.get(item_id)
+    if item is None:
+      item = self._items[item_id] = ItemProperties.from_json(json.loads(data))
+    return item
+
+  def _query(self, sql: str, params: tuple = ()) -> list[ItemProperties]:
+    return [self._build(item_id, data) for item_id, data in self.conn.execute(sql, params)]
+
+  def source_key(self) -> str | None:
+    '''snapshot_key() of the items-complete.json the catalogue was exported from.'''
+    row = self.conn.execute("SELECT value FROM meta WHERE key = 'source_key'").fetchone()
+    return row[0] if row else None
+
+  def lookup_by_item_id(self, item_id: int) -> ItemProperties:
+    items = self._query("SELECT id, data FROM items WHERE id = ?", (item_id,))
+    if not items:
+      raise KeyError("Cannot find the provided item ID number...")
+    return items[0]
+
+  def lookup_by_item_name(self, item_name: str, use_wiki_name: bool = False) -> ItemProperties:
+    '''Case insensitive, first match by id, ValueError if missing.'''
+    column = "wiki_name" if use_wiki_name else "name"
+    items = self._query(f"SELECT id, data FROM items WHERE {column} = ? COLLATE NOCASE ORDER BY id LIMIT 1",
+                        (item_name,))
+    if not items:
+      raise ValueError("Cannot find the provided item name...")
+    return items[0]
+
+  def items_named(self, names: Iterable[str], non_duplicate: bool = False) -> list[ItemProperties]:
+    '''All items whose exact name is in names, in id order.'''
+    names = list(set(names))
+    if not names:
+      return []
+    placeholders = ", ".join("?" * len(names))
+    sql = f"SELECT id, data FROM items WHERE name IN ({placeholders})"
+    if non_duplicate:
+      sql += " AND NOT duplicate"
+    return self._query(sql + " ORDER BY id", tuple(names))
+
+  def wiki_name_contains(self, text: str) -> list[ItemProperties]:
+    '''Non-duplicate items whose wiki_name contains text, in id order.'''
+    return self._query("SELECT id, data FROM items WHERE NOT duplicate AND instr(wiki_name, ?) > 0 ORDER BY id",
+                       (text,))
+
+  def wiki_name_contains_any(self, texts: Iterable[str]) -> list[ItemProperties]:
+    '''Non-duplicate items whose wiki_name contains any of texts, in id order, in one query.'''
+    texts = list(texts)
+    if not texts:
+      return []
+    condition = " OR ".join(["instr(wiki_name, ?) > 0"] * len(texts))
+    return self._query(f"SELECT id, data FROM items WHERE NOT duplicate AND ({condition}) ORDER BY id", tuple(texts))
+
+  def search(self, query: str, limit: int = 20) -> list[ItemProperties]:
+    '''Items whose name or wiki_name contains all words of query, the last word as a prefix, best matches first.'''
+    words = query.split()
+    if not words:
+      return []
+    if not self.has_fts:
+      sql = "SELECT id, data FROM items WHERE " + " AND ".join(["(name LIKE ? OR wiki_name LIKE ?)"] * len(words))
+      params = tuple(f"%{word}%" for word in words for _ in range(2))
+      return self._query(sql + " ORDER BY id LIMIT ?", params + (limit,))
+    match = " ".join('"' + word.replace('"', '""') + '"' for word in words) + "*"
+    return self._query("SELECT items.id, items.data FROM items_fts JOIN items ON items.id = items_fts.rowid "
+                       "WHERE items_fts MATCH ? ORDER BY rank LIMIT ?", (match, limit))
+
+  def names(self) -> set[str]:
+    '''Every distinct name and wiki_name.'''
+    return {name for name, in self.conn.execute(
+        "SELECT name FROM items UNION SELECT wiki_name FROM items WHERE wiki_name IS NOT NULL")}
+
+  def overrides(self) -> dict[str, dict]:
+    '''The lms_items_without_wiki_page overrides the catalogue was exported with, in their original order.'''
+    return {name: json.loads(data) for name, data in self.conn.execute("SELECT name, data FROM overrides ORDER BY rowid")}
@@ -0,0 +1,124 @@
+'''Batched field-by-field diff of (base item, minigame variant) pairs.
+
+Walks the dataclass fields of both items with getattr, descending into nested dataclasses such as
+ItemEquipment and ItemWeapon, so nothing is copied the way asdict() copies every item. Differences are
+reported per item as dotted field paths ("equipment.attack_ranged"), and summed per field over the batch
+to spot stat drift across the whole LMS catalogue after a game update.
+'''
+
+import json
+from dataclasses import dataclass, fields, is_dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable
+
+from osrsreboxed.items_api.item_properties import ItemProperties
+
+from item_variants import Variant
+
+# fields that tell the two items apart rather than describe them, always different between a base item and its variant
+IDENTITY_FIELDS = frozenset({"id", "name", "wiki_name", "wiki_url", "linked_id_item", "linked_id_noted",
+                             "linked_id_placeholder", "last_updated", "icon"})
+
+
+@lru_cache(maxsize=None)
+def _field_names(cls: type) -> tuple[str, ...]:
+  return tuple(f.name for f in fields(cls))
+
+
+def diff_fields(a: Any, b: Any, ignore: Iterable[str] = (), prefix: str = "") -> dict[str, tuple[Any, Any]]:
+  '''{field path: (a value, b value)} for every field of the dataclass a that differs in b.
+  Nested dataclasses are compared field by field; ignore holds full dotted paths.'''
+  differences = {}
+  for name in _field_names(type(a)):
+    path = prefix + name
+    if path in ignore:
+      continue
+    value_a = getattr(a, name)
+    value_b = getattr(b, name, None)
+    if value_a == value_b:
+      continue
+    if is_dataclass(value_a) and type(value_a) is type(value_b):
+      differences.update(diff_fields(value_a, value_b, ignore, path + "."))
+    else:
+      differences[path] = (value_a, value_b)
+  return differences
+
+
+@dataclass
+class ItemDiff:
+  base: ItemProperties
+  variant: ItemProperties
+  differences: dict[str, tuple[Any, Any]]
+
+  def to_dict(self) -> dict:
+    return {
+      "base_id": self.base.id,
+      "variant_id": self.variant.id,
+      "name": self.variant.wiki_name,
+      "differences": {path: [_jsonable(a), _jsonable(b)] for path, (a, b) in self.differences.items()},
+    }
+
+
+def _jsonable(value: Any) -> Any:
+  # whole nested objects show up here when one side is None, e.g. an item that gained a weapon block
+  if is_dataclass(value):
+    return vars(value)
+  return value
+
+
+def variant_pairs(items: Iterable[ItemProperties], variant: Variant) -> list[tuple[ItemProperties, ItemProperties]]:
+  '''(base item, variant item) for every non-duplicate "X (suffix)" item of variant whose base "X" exists.'''
+  by_wiki_name = {}
+  variant_items = []
+  for item in items:
+    if item.duplicate or not item.wiki_name:
+      continue
+    base_name = variant.base_name(item.wiki_name)
+    if base_name is not None:
+      variant_items.append((base_name, item))
+    else:
+      by_wiki_name.setdefault(item.wiki_name, item)
+  pairs = []
+  for base_name, item in variant_items:
+    base = by_wiki_name.get(base_name)
+    if base is not None:
+      pairs.append((base, item))
+  return pairs
+
+
+def diff_pairs(pairs: Iterable[tuple[ItemProperties, ItemProperties]],
+               ignore: Iterable[str] = IDENTITY_FIELDS) -> list[ItemDiff]:
+  ignore = frozenset(ignore)
+  return [ItemDiff(base, variant, diff_fields(base, variant, ignore)) for base, variant in pairs]
+
+
+def field_counts(diffs: list[ItemDiff]) -> dict[str, int]:
+  '''How many pairs differ in each field path, most common first.'''
+  counts = {}
+  for diff in diffs:
+    for path in diff.differences:
+      counts[path] = counts.get(path, 0) + 1
+  return dict(sorted(counts.items(), key=lambda entry: (-entry[1], entry[0])))
+
+
+def diff_table(diffs: list[ItemDiff]) -> str:
+  '''Per-field counts followed by one line per differing field of each pair.'''
+  lines = [f"{len(diffs)} pairs, {sum(1 for diff in diffs if diff.differences)} with differences", "",
+           f"{'field':<32}{'pairs':>6}"]
+  for path, n in field_counts(diffs).items():
+    lines.append(f"{path:<32}{n:>6}")
+  for diff in diffs:
+    if not diff.differences:
+      continue
+    lines.append("")
+    lines.append(f"{diff.variant.wiki_name} ({diff.base.id} -> {diff.variant.id})")
+    for path, (a, b) in diff.differences.items():
+      lines.append(f"  {path:<30}{a!r} -> {b!r}")
+  return "\n".join(lines)
+
+
+def write_diff_json(diffs: list[ItemDiff], path: Path | str):
+  with open(path, "w") as f:
+    json.dump({"field_counts": field_counts(diffs), "pairs": [diff.to_dict() for diff in diffs]}, f, indent=2)
+    f.write("\n")
@@ -0,0 +1,252 @@
+'''Async fetcher with an on-disk HTTP cache, for pulling LMS item data from the wiki.
+
+AsyncFetcher runs GETs on asyncio with a bound on requests in flight and a minimum interval between requests
+to the same host. Every response is stored in ./.cache/http; within the TTL a URL is answered from disk
+without touching the network, after it the cached copy is revalidated with If-None-Match/If-Modified-Since.
+
+The wiki's raw wikitext of a base item page (".../w/Rune_defender?action=raw") is parsed for its Infobox Item
+version labelled Last Man Standing, into the same dict shape as lms_items_without_wiki_page entries.
+'''
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import ssl
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote, urlsplit
+
+from cache_paths import CACHE_DIR
+from metrics import metrics
+from wiki_api import USER_AGENT
+
+HTTP_CACHE_DIR = CACHE_DIR / "http"
+WIKI_URL = "https://oldschool.runescape.wiki"
+DEFAULT_TTL = 24 * 60 * 60
+# a missing page is as much an answer as a found one, and is cached the same way; server errors are not
+CACHED_STATUSES = {200, 404, 410}
+
+
+class FetchError(Exception):
+  pass
+
+
+class HttpCache:
+  '''One metadata JSON and one body file per URL, named after the URL's hash.'''
+
+  def __init__(self, cache_dir: Path | str = HTTP_CACHE_DIR):
+    self.cache_dir = Path(cache_dir)
+
+  def _paths(self, url: str) -> tuple[Path, Path]:
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+  def get(self, url: str) -> tuple[Optional[dict], Optional[bytes]]:
+    meta_path, body_path = self._paths(url)
+    try:
+      with open(meta_path) as f:
+        meta = json.load(f)
+      return meta, body_path.read_bytes()
+    except (OSError, ValueError):
+      return None, None
+
+  def put(self, url: str, meta: dict, body: Optional[bytes] = None):
+    '''Store the response for url; body None only refreshes the metadata of an already cached body.'''
+    self.cache_dir.mkdir(parents=True, exist_ok=True)
+    meta_path, body_path = self._paths(url)
+    if body is not None:
+      tmp_path = body_path.with_suffix(".tmp")
+      tmp_path.write_bytes(body)
+      os.replace(tmp_path, body_path)
+    tmp_path = meta_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+      json.dump(dict(meta, url=url), f)
+    os.replace(tmp_path, meta_path)
+
+
+async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+  chunks = []
+  while True:
+    size = int((await reader.readline()).split(b";", 1)[0].strip(), 16)
+    if size == 0:
+      # trailers, if any, end with an empty line
+      while (await reader.readline()).strip():
+        pass
+      return b"".join(chunks)
+    chunks.append(await reader.readexactly(size))
+    await reader.readline()
+
+
+async def http_get(url: str, headers: dict[str, str], timeout: float = 30.0) -> tuple[int, dict[str, str], bytes]:
+  '''A single HTTP/1.1 GET over asyncio streams, returning (status, lower-cased headers, body).'''
+  parts = urlsplit(url)
+  https = parts.scheme == "https"
+  port = parts.port or (443 if https else 80)
+  target = parts.path or "/"
+  if parts.query:
+    target += "?" + parts.query
+  reader, writer = await asyncio.wait_for(
+      asyncio.open_connection(parts.hostname, port, ssl=ssl.create_default_context() if https else None), timeout)
+  try:
+    request_headers = {"Host": parts.netloc, "Connection": "close", **headers}
+    writer.write((f"GET {target} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in request_headers.items())
+                  + "\r\n").encode("latin-1"))
+    await writer.drain()
+    status_line = await asyncio.wait_for(reader.readline(), timeout)
+    try:
+      status = int(status_line.split()[1])
+    except (IndexError, ValueError):
+      raise FetchError(f"Bad status line from {url}: {status_line!r}")
+    response_headers = {}
+    while (line := await reader.readline()).strip():
+      name, _, value = line.decode("latin-1").partition(":")
+      response_headers[name.strip().lower()] = value.strip()
+    if status == 304 or status < 200:
+      body = b""
+    elif response_headers.get("transfer-encoding", "").lower() == "chunked":
+      body = await asyncio.wait_for(_read_chunked(reader), timeout)
+    elif "content-length" in response_headers:
+      body = await asyncio.wait_for(reader.readexactly(int(response_headers["content-length"])), timeout)
+    else:
+      body = await asyncio.wait_for(reader.read(), timeout)
+    return status, response_headers, body
+  finally:
+    writer.close()
+
+
+class AsyncFetcher:
+  '''Cached GETs with at most `concurrency` in flight and `per_host_interval` seconds between starts per host.'''
+
+  def __init__(self, cache: Optional[HttpCache] = None, concurrency: int = 8, per_host_interval: float = 0.1,
+               ttl: float = DEFAULT_TTL, user_agent: str = USER_AGENT):
+    self.cache = cache or HttpCache()
+    self.concurrency = concurrency
+    self.per_host_interval = per_host_interval
+    self.ttl = ttl
+    self.user_agent = user_agent
+    self.network_requests = 0
+    self.cache_hits = 0
+    self.not_modified = 0
+    self._semaphore: Optional[asyncio.Semaphore] = None
+    self._host_locks: dict[str, asyncio.Lock] = {}
+    self._host_next_start: dict[str, float] = {}
+
+  async def _wait_for_host(self, host: str):
+    lock = self._host_locks.setdefault(host, asyncio.Lock())
+    async with lock:
+      delay = self._host_next_start.get(host, 0.0) - time.monotonic()
+      if delay > 0:
+        await asyncio.sleep(delay)
+      self._host_next_start[host] = time.monotonic() + self.per_host_interval
+
+  async def fetch(self, url: str) -> bytes:
+    '''The body of url, from the cache while it is fresh, revalidated or refetched otherwise.'''
+    meta, body = self.cache.get(url)
+    if meta is not None and time.time() - meta["fetched_at"] < self.ttl:
+      self.cache_hits += 1
+      metrics.count("http_cache_hits")
+      return self._result(url, meta.get("status", 200), body)
+
+    headers = {"User-Agent": self.user_agent}
+    if meta is not None:
+      if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+      if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    async with self._semaphore:
+      await self._wait_for_host(urlsplit(url).netloc)
+      self.network_requests += 1
+      metrics.count("http_requests")
+      status, response_headers, response_body = await http_get(url, headers)
+
+    if status == 304 and meta is not None:
+      self.not_modified += 1
+      self.cache.put(url, dict(meta, fetched_at=time.time()))
+      return self._result(url, meta.get("status", 200), body)
+    if status in CACHED_STATUSES:
+      self.cache.put(url, {"fetched_at": time.time(), "status": status, "etag": response_headers.get("etag"),
+                           "last_modified": response_headers.get("last-modified")}, response_body)
+    return self._result(url, status, response_body)
+
+  @staticmethod
+  def _result(url: str, status: int, body: bytes) -> bytes:
+    if status != 200:
+      raise FetchError(f"GET {url} returned HTTP {status}")
+    return body
+
+  async def _fetch_all(self, urls: list[str]) -> dict[str, bytes | Exception]:
+    self._semaphore = asyncio.Semaphore(self.concurrency)
+    results = await asyncio.gather(*(self.fetch(url) for url in urls), return_exceptions=True)
+    return dict(zip(urls, results))
+
+  def fetch_all(self, urls: list[str]) -> dict[str, bytes | Exception]:
+    '''{url: body, or the exception that fetching it raised} for every url, run on a fresh event loop.'''
+    return asyncio.run(self._fetch_all(list(dict.fromkeys(urls))))
+
+
+def wiki_raw_url(title: str, wiki_url: str = WIKI_URL) -> str:
+  return f"{wiki_url}/w/{quote(title.replace(' ', '_'))}?action=raw"
+
+
+_INFOBOX_ITEM = re.compile(r"\{\{\s*Infobox Item\s*\|(.*?)\n\}\}", re.S | re.I)
+
+
+def parse_infobox_item(wikitext: str) -> dict[str, str]:
+  '''The |key = value parameters of the first Infobox Item in wikitext, keys lower-cased.'''
+  match = _INFOBOX_ITEM.search(wikitext)
+  if match is None:
+    return {}
+  params = {}
+  for line in ("|" + match.group(1)).split("\n|"):
+    key, sep, value = line.lstrip("|").partition("=")
+    if sep:
+      params[key.strip().lower()] = value.strip()
+  return params
+
+
+def _version_field(params: dict[str, str], field: str, version: str) -> Optional[str]:
+  value = params.get(f"{field}{version}", params.get(field))
+  return value if value not in (None, "", "N/A") else None
+
+
+def _int(value: Optional[str]) -> Optional[int]:
+  if value is None:
+    return None
+  match = re.search(r"-?[\d,]+", value)
+  return int(match.group().replace(",", "")) if match else None
+
+
+def _yes(value: Optional[str]) -> bool:
+  return (value or "").strip().lower() == "yes"
+
+
+def lms_overrides_from_infobox(params: dict[str, str]) -> Optional[dict]:
+  '''An lms_items_without_wiki_page style entry from the Infobox Item version labelled Last Man Standing, or
+  None if the page has no such version. The wiki doesn't list noted/placeholder ids; they get the values most
+  hand-maintained entries use.'''
+  version = next((key[len("version"):] for key, value in params.items()
+                  if key.startswith("version") and "last man standing" in value.lower()), None)
+  if version is None:
+    return None
+  item_id = _int(_version_field(params, "id", version))
+  if item_id is None:
+    return None
+  cost = _int(_version_field(params, "value", version)) or 0
+  alchable = _version_field(params, "alchable", version)
+  alchable = alchable is None or _yes(alchable)
+  return {
+    "buy_limit": _int(_version_field(params, "buy limit", version)),
+    "cost": cost,
+    "highalch": cost * 6 // 10 if alchable else 0,
+    "id": item_id,
+    "linked_id_noted": 0,
+    "linked_id_placeholder": None,
+    "lowalch": cost * 4 // 10 if alchable else 0,
+    "members": _yes(_version_field(params, "members", version)),
+    "noteable": True,
+    "tradeable": _yes(_version_field(params, "tradeable", version)),
+    "tradeable_on_ge": _yes(_version_field(params, "exchange", version)),
+  }
@@ -0,0 +1,84 @@
+'''Hash indexes over AllItems for name, wiki_name and id lookups.
+
+AllItems.lookup_by_item_name scans the whole item list on every call. ItemIndex walks the items once and
+answers the same questions with dict lookups afterwards.
+'''
+
+from typing import Iterable
+
+from osrsreboxed.items_api.all_items import AllItems
+from osrsreboxed.items_api.item_properties import ItemProperties
+
+
+class ItemIndex:
+  '''Built-once lookup tables over an AllItems object.
+
+  Lists keep the id order of AllItems, so the first entry for a name is the item
+  AllItems.lookup_by_item_name would have returned.
+  '''
+
+  def __init__(self, items: AllItems | Iterable[ItemProperties]):
+    self.items: list[ItemProperties] = list(items)
+    self.by_id: dict[int, ItemProperties] = {}
+    self.by_name: dict[str, list[ItemProperties]] = {}
+    self.by_name_lower: dict[str, list[ItemProperties]] = {}
+    self.by_wiki_name: dict[str, ItemProperties] = {}
+    self.by_wiki_name_lower: dict[str, ItemProperties] = {}
+    self.non_duplicate_items: list[ItemProperties] = []
+    self.non_duplicate_by_name: dict[str, list[ItemProperties]] = {}
+
+    for item in self.items:
+      self.by_id[item.id] = item
+      self.by_name.setdefault(item.name, []).append(item)
+      self.by_name_lower.setdefault(item.name.lower(), []).append(item)
+      if item.wiki_name:
+        self.by_wiki_name.setdefault(item.wiki_name, item)
+        self.by_wiki_name_lower.setdefault(item.wiki_name.lower(), item)
+      if not item.duplicate:
+        self.non_duplicate_items.append(item)
+        self.non_duplicate_by_name.setdefault(item.name, []).append(item)
+
+  def __len__(self) -> int:
+    return len(self.items)
+
+  def __iter__(self):
+    return iter(self.items)
+
+  def lookup_by_item_id(self, item_id: int) -> ItemProperties:
+    '''Same contract as AllItems.lookup_by_item_id.'''
+    try:
+      return self.by_id[item_id]
+    except KeyError:
+      raise KeyError("Cannot find the provided item ID number...")
+
+  def lookup_by_item_name(self, item_name: str, use_wiki_name: bool = False) -> ItemProperties:
+    '''Same contract as AllItems.lookup_by_item_name: case insensitive, first match by id, ValueError if missing.'''
+    if use_wiki_name:
+      item = self.by_wiki_name_lower.get(item_name.lower())
+    else:
+      matches = self.by_name_lower.get(item_name.lower())
+      item = matches[0] if matches else None
+    if item is None:
+      raise ValueError("Cannot find the provided item name...")
+    return item
+
+  def items_named(self, names: Iterable[str], non_duplicate: bool = False) -> list[ItemProperties]:
+    '''All items whose exact name is in names, in id order.'''
+    table = self.non_duplicate_by_name if non_duplicate else self.by_name
+    matches = [item for name in set(names) for item in table.get(name, ())]
+    matches.sort(key=lambda x: x.id)
+    return matches
+
+  def wiki_name_contains(self, text: str) -> list[ItemProperties]:
+    '''Non-duplicate items whose wiki_name contains text, in id order.'''
+    return [item for item in self.non_duplicate_items if item.wiki_name and text in item.wiki_name]
+
+  def wiki_name_contains_any(self, texts: Iterable[str]) -> list[ItemProperties]:
+    '''Non-duplicate items whose wiki_name contains any of texts, in id order, in one pass.'''
+    texts = list(texts)
+    return [item for item in self.non_duplicate_items
+            if item.wiki_name and any(text in item.wiki_name for text in texts)]
+
+  def names(self) -> set[str]:
+    '''Every distinct name and wiki_name.'''
+    return self.by_name.keys() | self.by_wiki_name.keys()
@@ -0,0 +1,80 @@
+'''Streaming projection loader for the osrsreboxed item database.
+
+Reads items-complete.json in chunks and decodes one item record at a time, only building ItemProperties
+objects for the records that match the requested names, ids or wiki_name. Everything else is dropped as
+soon as it has been checked, so memory stays proportional to the projected items, not the whole database.
+'''
+
+import json
+from pathlib import Path
+from typing import Callable, Generator, Iterable, Optional
+
+from osrsreboxed.items_api.all_items import AllItems, PATH_TO_ITEMS_COMPLETE_JSON
+from osrsreboxed.items_api.item_properties import ItemProperties
+
+from item_cache import items_from_list
+
+CHUNK_SIZE = 1 << 20
+
+
+def iter_item_records(path: Path = PATH_TO_ITEMS_COMPLETE_JSON,
+                      chunk_size: int = CHUNK_SIZE) -> Generator[dict, None, None]:
+  '''Incrementally yield each item record dict from the top-level {"id": {...}, ...} JSON object.'''
+  decoder = json.JSONDecoder()
+  whitespace = " \t\r\n,"
+  with open(path, encoding="utf-8") as f:
+    buffer = f.read(chunk_size).lstrip()
+    if not buffer.startswith("{"):
+      raise ValueError(f"Error: {path} is not a JSON object of item records.")
+    pos = 1
+    eof = False
+    while True:
+      while pos < len(buffer) and buffer[pos] in whitespace:
+        pos += 1
+      if pos < len(buffer) and buffer[pos] == "}":
+        return
+      try:
+        _, pos_after_key = decoder.raw_decode(buffer, pos)
+        colon = buffer.index(":", pos_after_key)
+        value_start = colon + 1
+        while buffer[value_start] in whitespace:
+          value_start += 1
+        record, end = decoder.raw_decode(buffer, value_start)
+      except (json.JSONDecodeError, ValueError, IndexError):
+        # the record straddles the end of the buffer, pull in the next chunk and retry
+        if eof:
+          raise ValueError(f"Error: truncated item record in {path} at offset {pos}.")
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        continue
+      pos = end
+      yield record
+
+
+def iter_matching_items(names: Iterable[str] = (),
+                        ids: Iterable[int] = (),
+                        wiki_name_predicate: Optional[Callable[[str], bool]] = None,
+                        path: Path = PATH_TO_ITEMS_COMPLETE_JSON) -> Generator[ItemProperties, None, None]:
+  '''Yield ItemProperties for records whose name or wiki_name is in names (case insensitive, like
+  AllItems.lookup_by_item_name), whose id is in ids, or whose wiki_name satisfies wiki_name_predicate.'''
+  names = {name.lower() for name in names}
+  ids = set(ids)
+  for record in iter_item_records(path):
+    wiki_name = record.get("wiki_name") or ""
+    if (record["id"] in ids or
+        record["name"].lower() in names or
+        wiki_name.lower() in names or
+        (wiki_name_predicate is not None and wiki_name and wiki_name_predicate(wiki_name))):
+      yield ItemProperties.from_json(record)
+
+
+def load_matching_items(names: Iterable[str] = (),
+                        ids: Iterable[int] = (),
+                        wiki_name_predicate: Optional[Callable[[str], bool]] = None,
+                        path: Path = PATH_TO_ITEMS_COMPLETE_JSON) -> AllItems:
+  '''Build an AllItems holding only the matching items, sorted by id like items_api.load(), so lookups
+  and iteration over it give the same results as the full database for the projected items.'''
+  matched = sorted(iter_matching_items(names, ids, wiki_name_predicate, path), key=lambda x: x.id)
+  return items_from_list(matched)
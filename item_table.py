@@ -0,0 +1,100 @@
+'''Optional columnar NumPy view of AllItems for vectorized queries over the whole database.
+
+Each ItemProperties attribute the queries need becomes one array: ids, costs, release dates as datetime64,
+slot and weapon_type as categorical codes, and the 14 equipment bonuses as an int matrix. Filters return
+boolean masks that combine with & and |, and select() turns a mask into item ids, e.g.
+
+  table = ItemTable(items)
+  table.select(table.non_duplicate() & table.wiki_name_contains("Last Man Standing"))
+  table.select(table.released_before("2016-08-04") & table.weapon_type_is("crossbow"))
+
+NumPy is only needed when this module is used.
+'''
+
+from typing import Iterable
+
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
+from osrsreboxed.items_api.item_properties import ItemProperties
+
+BONUS_COLUMNS = ["attack_stab", "attack_slash", "attack_crush", "attack_magic", "attack_ranged",
+                 "defence_stab", "defence_slash", "defence_crush", "defence_magic", "defence_ranged",
+                 "melee_strength", "ranged_strength", "magic_damage", "prayer"]
+
+
+def _require_numpy():
+  if np is None:
+    raise ImportError("ItemTable needs numpy, install it with `pip install numpy`")
+
+
+def _categorical(values: list) -> tuple['np.ndarray', list]:
+  '''Encode values as int16 codes into a sorted category list, None becomes -1.'''
+  categories = sorted({value for value in values if value is not None})
+  lookup = {value: code for code, value in enumerate(categories)}
+  codes = np.fromiter((lookup.get(value, -1) for value in values), dtype=np.int16, count=len(values))
+  return codes, categories
+
+
+class ItemTable:
+  '''Column arrays over a list of items, row i of every column belongs to the same item.'''
+
+  def __init__(self, items: Iterable[ItemProperties]):
+    _require_numpy()
+    items = list(items)
+    n = len(items)
+    self.ids = np.fromiter((item.id for item in items), dtype=np.int64, count=n)
+    self.costs = np.fromiter((item.cost for item in items), dtype=np.int64, count=n)
+    self.duplicate = np.fromiter((item.duplicate for item in items), dtype=bool, count=n)
+    self.members = np.fromiter((item.members for item in items), dtype=bool, count=n)
+    self.equipable = np.fromiter((item.equipable_by_player for item in items), dtype=bool, count=n)
+    self.release_dates = np.array([item.release_date or "NaT" for item in items], dtype="datetime64[D]")
+    self.names = np.array([item.name for item in items], dtype=str)
+    self.wiki_names = np.array([item.wiki_name or "" for item in items], dtype=str)
+    self.slots, self.slot_categories = _categorical([item.equipment.slot if item.equipment else None for item in items])
+    self.weapon_types, self.weapon_type_categories = _categorical(
+        [item.weapon.weapon_type if item.weapon else None for item in items])
+    self.bonuses = np.zeros((n, len(BONUS_COLUMNS)), dtype=np.int32)
+    for row, item in enumerate(items):
+      if item.equipment:
+        equipment = vars(item.equipment)
+        self.bonuses[row] = [equipment[column] for column in BONUS_COLUMNS]
+
+  def __len__(self) -> int:
+    return len(self.ids)
+
+  def select(self, mask: 'np.ndarray') -> 'np.ndarray':
+    '''Item ids of the rows where mask is True.'''
+    return self.ids[mask]
+
+  def non_duplicate(self) -> 'np.ndarray':
+    return ~self.duplicate
+
+  def name_contains(self, text: str) -> 'np.ndarray':
+    return np.char.find(self.names, text) >= 0
+
+  def wiki_name_contains(self, text: str) -> 'np.ndarray':
+    return np.char.find(self.wiki_names, text) >= 0
+
+  def name_in(self, names: Iterable[str]) -> 'np.ndarray':
+    return np.isin(self.names, list(names))
+
+  def released_before(self, date: str) -> 'np.ndarray':
+    '''Rows released strictly before date (YYYY-MM-DD); items without a release date never match.'''
+    return self.release_dates < np.datetime64(date, "D")
+
+  def slot_is(self, slot: str) -> 'np.ndarray':
+    if slot not in self.slot_categories:
+      return np.zeros(len(self), dtype=bool)
+    return self.slots == self.slot_categories.index(slot)
+
+  def weapon_type_is(self, weapon_type: str) -> 'np.ndarray':
+    if weapon_type not in self.weapon_type_categories:
+      return np.zeros(len(self), dtype=bool)
+    return self.weapon_types == self.weapon_type_categories.index(weapon_type)
+
+  def bonus(self, column: str) -> 'np.ndarray':
+    '''One equipment bonus column, e.g. table.bonus("attack_ranged") > 100.'''
+    return self.bonuses[:, BONUS_COLUMNS.index(column)]
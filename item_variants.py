@@ -0,0 +1,65 @@
+'''Minigame-exclusive item variants, e.g. "Abyssal whip (Last Man Standing)" or "Slayer helmet (i) (Soul Wars)".
+
+A Variant names how its pages are titled and linked, and carries the override data for the variants that have
+no item of their own yet. classify_items sorts a list of items into every registered variant in one pass, so
+adding a variant doesn't add another scan of the item database.
+'''
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:
+  from osrsreboxed.items_api.item_properties import ItemProperties
+
+
+@dataclass(frozen=True)
+class Variant:
+  key: str
+  # wiki_name of the variant is the base item's wiki_name plus " (suffix)"
+  suffix: str
+  # wiki_url of the variant, from the base item's wiki_url without its #section
+  url_pattern: str
+  overrides: dict[str, dict] = field(default_factory=dict, compare=False, repr=False)
+  # templates/ file the variant's pages are rendered with, None if the variant has no template yet
+  template_name: Optional[str] = None
+  # release dates before the minigame's own release are moved up to it
+  release_date: Optional[str] = None
+
+  @property
+  def marker(self) -> str:
+    return f"({self.suffix})"
+
+  def wiki_name(self, base_wiki_name: str) -> str:
+    return f"{base_wiki_name} {self.marker}"
+
+  def wiki_url(self, base_wiki_url: str) -> str:
+    return self.url_pattern.format(base_url=base_wiki_url.split("#", 1)[0])
+
+  def base_name(self, name: str) -> Optional[str]:
+    '''name without its trailing "(suffix)", matched case-insensitively, or None if it doesn't end in one.'''
+    if name.lower().endswith(self.marker.lower()):
+      return name[:-len(self.marker)].rstrip()
+    return None
+
+
+def marker_pattern(variants: Iterable[Variant]) -> re.Pattern:
+  '''One alternation over every variant's "(suffix)", so a wiki_name is scanned once for all of them.'''
+  return re.compile("|".join(re.escape(variant.marker) for variant in variants))
+
+
+def classify_items(items: Iterable[ItemProperties], variants: Iterable[Variant]) -> dict[str, list[ItemProperties]]:
+  '''{variant key: its non-duplicate items, in the order of items} for every variant, in one pass over items.
+  An item whose wiki_name carries several markers is listed under each of them.'''
+  variants = list(variants)
+  by_marker = {variant.marker: variant.key for variant in variants}
+  pattern = marker_pattern(variants)
+  classified = {variant.key: [] for variant in variants}
+  for item in items:
+    if item.duplicate or not item.wiki_name:
+      continue
+    for key in {by_marker[match.group()] for match in pattern.finditer(item.wiki_name)}:
+      classified[key].append(item)
+  return classified
@@ -0,0 +1,25 @@
+'''Base request handler shared by the local HTTP servers (render_service and wiki_stub).'''
+
+from http.server import BaseHTTPRequestHandler
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+  '''HTTP/1.1 keep-alive handler that sends each response in one buffered write and doesn't log requests.'''
+  protocol_version = "HTTP/1.1"
+  # send each response in one buffered write with Nagle off; headers and body as separate small writes stall
+  # keep-alive clients on delayed ACKs for ~40ms per request
+  wbufsize = -1
+  disable_nagle_algorithm = True
+
+  def log_message(self, format, *args):
+    # one line per request would cost more than answering it
+    pass
+
+  def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None):
+    self.send_response(status)
+    self.send_header("Content-Type", content_type)
+    self.send_header("Content-Length", str(len(body)))
+    for name, value in (headers or {}).items():
+      self.send_header(name, value)
+    self.end_headers()
+    self.wfile.write(body)
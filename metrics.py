@@ -0,0 +1,154 @@
+'''Per-stage timers and counters for the page pipeline.
+
+Pipeline code wraps its stages in `with metrics.stage("name"):` and bumps counters with metrics.count(),
+on the shared module-level `metrics` object. Collection is always on and cheap; main() only prints the table
+and writes the JSON report when run with --profile.
+
+trace_memory() additionally runs tracemalloc and records, for every outermost stage on the calling thread, the
+peak traced memory during the stage, its net change and the source lines that grew the most. It is meant for
+low-memory runs: the snapshots it takes cost time and memory of their own on a large heap.
+'''
+
+import json
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+
+class Metrics:
+  '''Thread-safe accumulator of stage wall times and named counters.'''
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.stages: dict[str, dict] = {}
+    self.counters: Counter = Counter()
+    self.memory: dict[str, dict] = {}
+    self._memory_thread: Optional[int] = None
+    self._memory_depth = 0
+    self._memory_top = 0
+    self._memory_peak = 0
+
+  def trace_memory(self, top: int = 5):
+    '''Start tracemalloc and record the memory use of every outermost stage run on this thread from now on.'''
+    if not tracemalloc.is_tracing():
+      tracemalloc.start()
+    self._memory_thread = threading.get_ident()
+    self._memory_top = top
+
+  def peak_memory(self) -> int:
+    '''Highest traced memory in bytes since trace_memory(), 0 if memory isn't traced.'''
+    if not tracemalloc.is_tracing():
+      return self._memory_peak
+    return max(self._memory_peak, tracemalloc.get_traced_memory()[1])
+
+  @staticmethod
+  def _line_sizes() -> dict[str, int]:
+    # aggregated per source line straight away, so only one small dict is held across the stage, not the snapshot;
+    # the bookkeeping of tracemalloc and of this class is left out
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)])
+    return {f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}": stat.size
+            for stat in snapshot.statistics("lineno")}
+
+  def _memory_start(self) -> tuple[int, dict[str, int]]:
+    self._memory_peak = self.peak_memory()
+    line_sizes = self._line_sizes()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    return current, line_sizes
+
+  def _memory_end(self, name: str, start: tuple[int, dict[str, int]]):
+    current, peak = tracemalloc.get_traced_memory()
+    self._memory_peak = max(self._memory_peak, peak)
+    start_current, start_sizes = start
+    growth = Counter({line: size - start_sizes.get(line, 0) for line, size in self._line_sizes().items()})
+    entry = self.memory.setdefault(name, {"peak_bytes": 0, "net_bytes": 0, "top": {}})
+    entry["peak_bytes"] = max(entry["peak_bytes"], peak)
+    entry["net_bytes"] += current - start_current
+    top = Counter(entry["top"])
+    top.update({line: size for line, size in growth.most_common(self._memory_top) if size > 0})
+    entry["top"] = dict(top.most_common(self._memory_top))
+
+  @contextmanager
+  def stage(self, name: str):
+    '''Time the enclosed block and add it to the stage's total. Nested and repeated stages accumulate separately.'''
+    start = time.perf_counter()
+    tracing = self._memory_thread == threading.get_ident()
+    memory_start = self._memory_start() if tracing and self._memory_depth == 0 else None
+    if tracing:
+      self._memory_depth += 1
+    try:
+      yield self
+    finally:
+      if tracing:
+        self._memory_depth -= 1
+      if memory_start is not None:
+        self._memory_end(name, memory_start)
+      self.add_time(name, time.perf_counter() - start)
+
+  def add_time(self, name: str, seconds: float, calls: int = 1):
+    with self._lock:
+      entry = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+      entry["calls"] += calls
+      entry["seconds"] += seconds
+
+  def count(self, name: str, n: int = 1):
+    with self._lock:
+      self.counters[name] += n
+
+  def reset(self):
+    with self._lock:
+      self.stages.clear()
+      self.counters.clear()
+      self.memory.clear()
+
+  def to_dict(self) -> dict:
+    with self._lock:
+      data = {"stages": {name: dict(entry) for name, entry in self.stages.items()},
+              "counters": dict(self.counters)}
+      if self.memory:
+        data["memory"] = {name: dict(entry) for name, entry in self.memory.items()}
+        data["memory_peak_bytes"] = self.peak_memory()
+      return data
+
+  def merge(self, other: dict):
+    '''Fold in a to_dict() snapshot, e.g. one returned by a process pool worker.'''
+    for name, entry in other["stages"].items():
+      self.add_time(name, entry["seconds"], entry["calls"])
+    for name, n in other["counters"].items():
+      self.count(name, n)
+
+  def table(self) -> str:
+    data = self.to_dict()
+    lines = [f"{'stage':<28}{'calls':>8}{'seconds':>12}{'ms/call':>10}"]
+    for name, entry in data["stages"].items():
+      per_call = entry["seconds"] / entry["calls"] * 1000 if entry["calls"] else 0.0
+      lines.append(f"{name:<28}{entry['calls']:>8}{entry['seconds']:>12.4f}{per_call:>10.3f}")
+    lines.append("")
+    lines.append(f"{'counter':<28}{'value':>8}")
+    for name, value in sorted(data["counters"].items()):
+      lines.append(f"{name:<28}{value:>8}")
+    return "\n".join(lines)
+
+  def memory_table(self) -> str:
+    '''Peak and net traced memory per outermost stage, each followed by the lines that allocated the most in it.'''
+    mb = 1024 * 1024
+    lines = [f"{'stage':<28}{'peak MB':>10}{'net MB':>10}"]
+    for name, entry in self.memory.items():
+      lines.append(f"{name:<28}{entry['peak_bytes'] / mb:>10.2f}{entry['net_bytes'] / mb:>10.2f}")
+      for line, size in entry["top"].items():
+        lines.append(f"    {size / mb:>8.2f} MB  {line}")
+    lines.append(f"{'peak traced memory':<28}{self.peak_memory() / mb:>10.2f}")
+    return "\n".join(lines)
+
+  def write_json(self, path: Path | str):
+    with open(path, "w") as f:
+      json.dump(self.to_dict(), f, indent=2)
+      f.write("\n")
+
+
+metrics = Metrics()
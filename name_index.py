@@ -0,0 +1,129 @@
+'''Trigram index over item names and wiki_names for fuzzy name resolution.
+
+Every distinct name is split into lower-cased, space padded character trigrams and posted under each of them.
+A query counts shared trigrams over the postings it touches, shortlists the names sharing the most, and ranks
+those by the Dice coefficient of the two trigram sets, so a typo like "Spiked macles" still ranks
+"Spiked manacles" first.
+'''
+
+import hashlib
+import heapq
+import os
+import pickle
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from cache_paths import CACHE_DIR
+
+# scores at or above this are used as the match, anything lower is only reported
+CONFIDENT_SCORE = 0.75
+# names re-ranked by Dice score per candidate asked for, picked by raw shared trigram count
+SHORTLIST_FACTOR = 10
+
+
+def trigrams(text: str) -> set[str]:
+  padded = f" {text.lower()} "
+  return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class NameMatch:
+  query: str
+  name: str | None
+  score: float
+  candidates: list[tuple[str, float]] = field(default_factory=list)
+
+  @property
+  def exact(self) -> bool:
+    return self.score == 1.0
+
+  def describe(self) -> str:
+    ranked = ", ".join(f"{name!r} ({score:.2f})" for name, score in self.candidates)
+    if self.name is None:
+      return f"No confident match for {self.query!r}, candidates: {ranked or 'none'}"
+    return f"Matched {self.query!r} to {self.name!r} ({self.score:.2f}), candidates: {ranked}"
+
+
+class NameIndex:
+  '''Built-once trigram postings over a set of names.'''
+
+  def __init__(self, names: Iterable[str]):
+    self.names: list[str] = sorted({name for name in names if name})
+    self.by_lower: dict[str, str] = {}
+    self._sizes: list[int] = []
+    self._postings: dict[str, list[int]] = {}
+    for i, name in enumerate(self.names):
+      self.by_lower.setdefault(name.lower(), name)
+      grams = trigrams(name)
+      self._sizes.append(len(grams))
+      for gram in grams:
+        self._postings.setdefault(gram, []).append(i)
+
+  def __len__(self) -> int:
+    return len(self.names)
+
+  def candidates(self, query: str, limit: int = 5) -> list[tuple[str, float]]:
+    '''Up to limit (name, score) pairs, best first; an exact case-insensitive hit scores 1.0 and is returned alone.'''
+    exact = self.by_lower.get(query.lower())
+    if exact is not None:
+      return [(exact, 1.0)]
+    grams = trigrams(query)
+    shared = Counter()
+    for gram in grams:
+      shared.update(self._postings.get(gram, ()))
+    # scoring every name that shares a trigram is what makes a lookup slow, most share only one or two
+    scored = ((2 * n / (len(grams) + self._sizes[i]), i) for i, n in shared.most_common(limit * SHORTLIST_FACTOR))
+    return [(self.names[i], round(score, 3)) for score, i in heapq.nlargest(limit, scored)]
+
+  def resolve(self, query: str, min_score: float = CONFIDENT_SCORE) -> NameMatch:
+    '''The best candidate for query, or a NameMatch with name None if even the best one scores below min_score.'''
+    candidates = self.candidates(query)
+    if not candidates:
+      return NameMatch(query, None, 0.0)
+    name, score = candidates[0]
+    return NameMatch(query, name if score >= min_score else None, score, candidates)
+
+
+NAME_INDEX_PREFIX = "name-index-"
+# bump whenever trigrams(), the name normalization or NameIndex's attributes change, so saved indexes are rebuilt
+NAME_INDEX_VERSION = 2
+
+
+def name_index_path(key: str, exclude: Optional[re.Pattern] = None, cache_dir: Path = CACHE_DIR) -> Path:
+  exclude_digest = hashlib.sha1((exclude.pattern if exclude else "").encode()).hexdigest()[:8]
+  return Path(cache_dir) / f"{NAME_INDEX_PREFIX}v{NAME_INDEX_VERSION}-{key}-{exclude_digest}.pickle"
+
+
+def load_name_index(get_names: Callable[[], Iterable[str]], key: str | None, cache_dir: Path = CACHE_DIR,
+                    exclude: Optional[re.Pattern] = None) -> NameIndex:
+  '''The NameIndex for the item database identified by key (a snapshot_key()), prebuilt in cache_dir.
+  Built from get_names(), leaving out the names exclude matches, and saved on a miss or an unreadable file;
+  key None always builds.'''
+  def build() -> NameIndex:
+    names = get_names()
+    return NameIndex(names if exclude is None else (name for name in names if not exclude.search(name)))
+
+  if key is None:
+    return build()
+  path = name_index_path(key, exclude, cache_dir)
+  if path.is_file():
+    try:
+      with open(path, "rb") as f:
+        name_index = pickle.load(f)
+      if isinstance(name_index, NameIndex):
+        return name_index
+      print(f"Ignoring name index {path}, it doesn't hold a NameIndex")
+    except (OSError, EOFError, ValueError, AttributeError, ImportError, pickle.UnpicklingError) as e:
+      print(f"Ignoring unreadable name index {path}: {e!r}")
+  name_index = build()
+  path.parent.mkdir(parents=True, exist_ok=True)
+  for stale in Path(cache_dir).glob(f"{NAME_INDEX_PREFIX}*.pickle"):
+    stale.unlink()
+  tmp_path = path.with_suffix(".tmp")
+  with open(tmp_path, "wb") as f:
+    pickle.dump(name_index, f, protocol=pickle.HIGHEST_PROTOCOL)
+  os.replace(tmp_path, path)
+  return name_index
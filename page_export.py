@@ -0,0 +1,137 @@
+'''Single-file exports of the rendered pages.
+
+ArchiveWriter takes the place of PageWriter and streams every submitted page into one file in a single
+sequential pass, with nothing written per page. The format follows the file name:
+
+  .xml                     MediaWiki export dump for Special:Import, pages titled after their wiki_url
+  .jsonl                   one {"title", "page", "wikitext"} object per line
+  .tar, .tar.gz, .tgz      one <page>.wikitext member per page
+  .tar.zst                 the same, zstd compressed; needs `pip install zstandard`
+'''
+
+import gzip
+import io
+import json
+import tarfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Optional
+from urllib.parse import unquote
+from xml.sax.saxutils import escape
+
+try:
+  import zstandard
+except ImportError:
+  zstandard = None
+
+from page_writer import PAGE_SUFFIX, sanitize_filename
+
+EXPORT_FORMATS = {".xml": "xml", ".jsonl": "jsonl", ".tar": "tar", ".tar.gz": "tar.gz", ".tgz": "tar.gz",
+                  ".tar.zst": "tar.zst"}
+MEDIAWIKI_XMLNS = "http://www.mediawiki.org/xml/export-0.11/"
+# Special:Import credits the revisions to this (interwiki prefixed) user name
+EXPORT_USERNAME = "create_lms_page"
+# revision timestamp and archive member mtime, fixed so the same pages always export to the same bytes
+EXPORT_TIMESTAMP = datetime(2016, 8, 4, tzinfo=timezone.utc)
+
+
+def wiki_title(wiki_url: Optional[str]) -> Optional[str]:
+  '''Page title from a wiki URL, e.g. ".../w/Dragon_knife_(Last_Man_Standing)" -> "Dragon knife (Last Man Standing)".'''
+  if not wiki_url:
+    return None
+  return unquote(wiki_url.split("#", 1)[0].rsplit("/w/", 1)[-1]).replace("_", " ")
+
+
+def export_format(path: Path | str) -> str:
+  name = Path(path).name.lower()
+  for suffix in sorted(EXPORT_FORMATS, key=len, reverse=True):
+    if name.endswith(suffix):
+      return EXPORT_FORMATS[suffix]
+  raise ValueError(f"Cannot tell the export format of {path}, expected one of {', '.join(EXPORT_FORMATS)}")
+
+
+class ArchiveWriter:
+  '''Drop-in for PageWriter that appends every page to one archive file. Use as a context manager.'''
+
+  def __init__(self, path: Path | str, comment: str = "Generated Last Man Standing item page",
+               timestamp: datetime = EXPORT_TIMESTAMP):
+    self.path = Path(path)
+    self.format = export_format(self.path)
+    if self.format == "tar.zst" and zstandard is None:
+      raise ImportError("Exporting .tar.zst needs zstandard, install it with `pip install zstandard`")
+    self.comment = comment
+    self.timestamp = timestamp.strftime("%Y-%m-%dT%H:%M:%SZ")
+    self.mtime = int(timestamp.timestamp())
+    self.pages_written = 0
+    # PageWriter compatible counters, an archive never skips a page
+    self.pages_unchanged = 0
+    self.bytes_written = 0
+    self.write_seconds = 0.0
+    self._lock = threading.Lock()
+    self._closed = False
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    self._file: BinaryIO = open(self.path, "wb")
+    self._stream: BinaryIO = self._file
+    self._tar: Optional[tarfile.TarFile] = None
+    if self.format == "xml":
+      self._write(f'<mediawiki xmlns="{MEDIAWIKI_XMLNS}" version="0.11" xml:lang="en">\n')
+    elif self.format.startswith("tar"):
+      if self.format == "tar.zst":
+        self._stream = zstandard.ZstdCompressor().stream_writer(self._file, closefd=False)
+      elif self.format == "tar.gz":
+        # tarfile's own "w|gz" puts the current time in the gzip header
+        self._stream = gzip.GzipFile(filename="", mode="wb", fileobj=self._file, mtime=self.mtime)
+      self._tar = tarfile.open(fileobj=self._stream, mode="w|", format=tarfile.PAX_FORMAT)
+
+  def __enter__(self) -> 'ArchiveWriter':
+    return self
+
+  def __exit__(self, exc_type, exc, tb):
+    self.close()
+
+  def _write(self, text: str):
+    self._stream.write(text.encode("utf-8"))
+
+  def submit(self, page_name: str, text: str, title: Optional[str] = None) -> Path:
+    '''Append a page to the archive, titled title or else page_name. Returns the archive's path.'''
+    if self._closed:
+      raise RuntimeError("ArchiveWriter is closed")
+    title = title or page_name
+    data = text.encode("utf-8")
+    start = time.perf_counter()
+    with self._lock:
+      if self.format == "xml":
+        self._write(f"  <page>\n    <title>{escape(title)}</title>\n    <ns>0</ns>\n    <revision>\n"
+                    f"      <timestamp>{self.timestamp}</timestamp>\n"
+                    f"      <contributor><username>{EXPORT_USERNAME}</username></contributor>\n"
+                    f"      <comment>{escape(self.comment)}</comment>\n"
+                    f"      <model>wikitext</model>\n      <format>text/x-wiki</format>\n"
+                    f'      <text xml:space="preserve" bytes="{len(data)}">{escape(text)}</text>\n'
+                    f"    </revision>\n  </page>\n")
+      elif self.format == "jsonl":
+        self._write(json.dumps({"title": title, "page": page_name, "wikitext": text}, ensure_ascii=False) + "\n")
+      else:
+        info = tarfile.TarInfo(sanitize_filename(page_name) + PAGE_SUFFIX)
+        info.size = len(data)
+        info.mtime = self.mtime
+        self._tar.addfile(info, io.BytesIO(data))
+      self.pages_written += 1
+      self.bytes_written += len(data)
+      self.write_seconds += time.perf_counter() - start
+    return self.path
+
+  def close(self):
+    if self._closed:
+      return
+    self._closed = True
+    try:
+      if self.format == "xml":
+        self._write("</mediawiki>\n")
+      elif self._tar is not None:
+        self._tar.close()
+      if self._stream is not self._file:
+        self._stream.close()
+    finally:
+      self._file.close()
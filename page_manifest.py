@@ -0,0 +1,130 @@
+'''Content-hash manifest for incremental page generation.
+
+page_outputs/manifest.json records, for every generated page, a hash of the inputs it was rendered from
+(the item data and the template source) and a hash of the rendered wikitext. A page whose inputs are
+unchanged and whose file on disk still matches the recorded output hash is skipped instead of rewritten.
+'''
+
+import hashlib
+import json
+from pathlib import Path
+
+from page_writer import PAGE_SUFFIX, page_path, write_atomic
+
+MANIFEST_NAME = "manifest.json"
+
+
+def hash_text(text: str) -> str:
+  return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _json_default(obj):
+  # nested dataclasses such as ItemEquipment are hashed through their attributes instead of being copied by asdict
+  return vars(obj) if hasattr(obj, "__dict__") else str(obj)
+
+
+def hash_inputs(item_fields: dict, template_source: str) -> str:
+  '''Hash the item data and template source a page is rendered from.'''
+  payload = json.dumps(item_fields, sort_keys=True, default=_json_default)
+  return hash_text(payload + "\0" + template_source)
+
+
+class PageManifest:
+  '''Tracks which pages in an output directory are up to date, and which were produced by this run.'''
+
+  def __init__(self, output_dir: Path | str, pages: dict | None = None):
+    self.output_dir = Path(output_dir)
+    self.pages: dict[str, dict] = pages or {}
+    self.seen: set[str] = set()
+    self.rendered = 0
+    self.skipped = 0
+    self.removed = 0
+
+  @classmethod
+  def load(cls, output_dir: Path | str) -> 'PageManifest':
+    path = Path(output_dir) / MANIFEST_NAME
+    if not path.is_file():
+      return cls(output_dir)
+    with open(path) as f:
+      data = json.load(f)
+    return cls(output_dir, data.get("pages", {}))
+
+  def save(self):
+    self.output_dir.mkdir(parents=True, exist_ok=True)
+    # written through a temp file so an interrupted run can't leave a truncated manifest and force a full re-render
+    write_atomic(self.output_dir / MANIFEST_NAME,
+                 json.dumps({"pages": dict(sorted(self.pages.items()))}, indent=2) + "\n", skip_unchanged=False)
+
+  def page_path(self, page_name: str) -> Path:
+    return page_path(self.output_dir, page_name)
+
+  def is_fresh(self, page_name: str, input_hash: str) -> bool:
+    '''True if the page was last rendered from the same inputs and the file on disk hasn't been touched since.'''
+    entry = self.pages.get(page_name)
+    if entry is None or entry["input_hash"] != input_hash:
+      return False
+    path = self.page_path(page_name)
+    if not path.is_file():
+      return False
+    return hash_text(path.read_text(encoding="utf-8")) == entry["output_hash"]
+
+  def mark_skipped(self, page_name: str):
+    self.seen.add(page_name)
+    self.skipped += 1
+
+  def record(self, page_name: str, input_hash: str, output: str):
+    self.seen.add(page_name)
+    self.rendered += 1
+    self.pages[page_name] = {
+      "file": self.page_path(page_name).name,
+      "input_hash": input_hash,
+      "output_hash": hash_text(output),
+    }
+
+  def for_page(self, page_name: str) -> 'PageManifest':
+    '''A manifest holding only one page's entry, small enough to hand to a render worker.'''
+    entry = self.pages.get(page_name)
+    return PageManifest(self.output_dir, {page_name: entry} if entry else {})
+
+  def merge(self, other: 'PageManifest'):
+    '''Fold a worker's manifest back in: its counters and the entries for the pages it handled.'''
+    for page_name in other.seen:
+      if page_name in other.pages:
+        self.pages[page_name] = other.pages[page_name]
+    self.seen |= other.seen
+    self.rendered += other.rendered
+    self.skipped += other.skipped
+
+  def orphans(self) -> list[Path]:
+    '''Page files and manifest entries that weren't produced by this run.'''
+    seen_paths = {self.page_path(name) for name in self.seen}
+    orphaned = {self.page_path(name) for name in self.pages if name not in self.seen}
+    orphaned |= set(self.output_dir.glob(f"*{PAGE_SUFFIX}")) - seen_paths
+    return sorted(orphaned)
+
+  def remove_orphans(self) -> list[Path]:
+    removed = []
+    orphaned = self.orphans()
+    for path in orphaned:
+      if path.is_file():
+        path.unlink()
+        removed.append(path)
+    orphaned = set(orphaned)
+    for name in [name for name in self.pages if self.page_path(name) in orphaned]:
+      del self.pages[name]
+    self.removed += len(removed)
+    return removed
+
+  def remove(self, page_name: str) -> Path | None:
+    '''Delete a page and its manifest entry, returning the deleted file if there was one.'''
+    self.pages.pop(page_name, None)
+    self.seen.discard(page_name)
+    path = self.page_path(page_name)
+    if not path.is_file():
+      return None
+    path.unlink()
+    self.removed += 1
+    return path
+
+  def summary(self) -> str:
+    return f"Pages rendered: {self.rendered}, skipped (unchanged): {self.skipped}, removed: {self.removed}"
@@ -0,0 +1,183 @@
+'''Atomic, batched background writer for page_outputs.
+
+Rendered pages are put on a queue and written by a small pool of background threads, so rendering never
+waits on disk I/O. Every page is written to a temp file in the same directory and renamed over the target,
+so a crash never leaves a half-written page behind. With fsync=True the renames are held back until close(),
+where the temp files are fsynced as one batch, renamed, and the directory entry is fsynced.
+'''
+
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+PAGE_SUFFIX = ".wikitext"
+# characters that aren't allowed in file names on at least one of Linux, macOS or Windows
+_UNSAFE_FILENAME_CHARS = re.compile(r'[\x00-\x1f<>:"/\\|?*]')
+_MAX_FILENAME_BYTES = 255
+
+
+def sanitize_filename(name: str) -> str:
+  '''Make a wiki page name safe to use as a file name, leaving ordinary names like
+  "3rd age range coif (Last Man Standing)" or "Inquisitor's mace" untouched.'''
+  safe = _UNSAFE_FILENAME_CHARS.sub("_", name).strip().rstrip(".")
+  if not safe:
+    raise ValueError(f"Cannot build a file name from page name {name!r}")
+  max_bytes = _MAX_FILENAME_BYTES - len(PAGE_SUFFIX)
+  while len(safe.encode("utf-8")) > max_bytes:
+    safe = safe[:-1]
+  return safe
+
+
+def page_path(output_dir: Path | str, page_name: str) -> Path:
+  return Path(output_dir) / f"{sanitize_filename(page_name)}{PAGE_SUFFIX}"
+
+
+def _current_umask() -> int:
+  umask = os.umask(0)
+  os.umask(umask)
+  return umask
+
+
+# read once, os.umask can only be read by setting it, which isn't safe while writer threads create files
+_UMASK = _current_umask()
+
+
+def _target_mode(path: Path) -> int:
+  '''The permissions path has, or that open() would give it as a new file.'''
+  try:
+    return os.stat(path).st_mode & 0o7777
+  except FileNotFoundError:
+    return 0o666 & ~_UMASK
+
+
+def _write_temp(path: Path, text: str) -> Path:
+  '''Write text to a new temp file next to path and return the temp file's path.
+  mkstemp creates the file as 0600, it gets path's mode so the rename doesn't change the target's permissions.'''
+  fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem[:40]}.", suffix=".tmp")
+  try:
+    os.chmod(tmp_name, _target_mode(path))
+    with open(fd, "w", encoding="utf-8") as f:
+      f.write(text)
+  except BaseException:
+    os.unlink(tmp_name)
+    raise
+  return Path(tmp_name)
+
+
+def _fsync_path(path: Path):
+  fd = os.open(path, os.O_RDONLY)
+  try:
+    os.fsync(fd)
+  finally:
+    os.close(fd)
+
+
+def write_atomic(path: Path | str, text: str, skip_unchanged: bool = True) -> bool:
+  '''Write text to path through a temp file and an atomic rename. Returns False if the file already held text.'''
+  path = Path(path)
+  if skip_unchanged and path.is_file() and path.read_text(encoding="utf-8") == text:
+    return False
+  os.replace(_write_temp(path, text), path)
+  return True
+
+
+class PageWriteError(Exception):
+  '''Raised by PageWriter.close() listing every page that couldn't be written.'''
+  def __init__(self, errors: list[tuple[Path, BaseException]]):
+    self.errors = errors
+    super().__init__(f"{len(errors)} page(s) failed to write: " + ", ".join(f"{path} ({e!r})" for path, e in errors))
+
+
+class PageWriter:
+  '''Queue-fed pool of writer threads for rendered pages. Use as a context manager, or call close() when done.'''
+
+  def __init__(self, output_dir: Path | str, workers: int = 4, fsync: bool = False,
+               skip_unchanged: bool = True, max_queued: int = 256):
+    self.output_dir = Path(output_dir)
+    self.fsync = fsync
+    self.skip_unchanged = skip_unchanged
+    self.pages_written = 0
+    self.pages_unchanged = 0
+    self.bytes_written = 0
+    # summed over the writer threads, so it can exceed wall time
+    self.write_seconds = 0.0
+    self.errors: list[tuple[Path, BaseException]] = []
+    self._pending_renames: list[tuple[Path, Path]] = []
+    self._lock = threading.Lock()
+    self._queue: queue.Queue = queue.Queue(maxsize=max_queued)
+    self._closed = False
+    self.output_dir.mkdir(parents=True, exist_ok=True)
+    self._threads = [threading.Thread(target=self._run, name=f"page-writer-{i}", daemon=True) for i in range(workers)]
+    for thread in self._threads:
+      thread.start()
+
+  def __enter__(self) -> 'PageWriter':
+    return self
+
+  def __exit__(self, exc_type, exc, tb):
+    self.close()
+
+  def submit(self, page_name: str, text: str, title: str | None = None) -> Path:
+    '''Queue a page for writing and return the path it will be written to.
+    title is only used by page_export.ArchiveWriter, files are always named after page_name.'''
+    if self._closed:
+      raise RuntimeError("PageWriter is closed")
+    path = page_path(self.output_dir, page_name)
+    self._queue.put((path, text))
+    return path
+
+  def _run(self):
+    while True:
+      job = self._queue.get()
+      if job is None:
+        return
+      path, text = job
+      start = time.perf_counter()
+      try:
+        self._write(path, text)
+      except Exception as e:
+        with self._lock:
+          self.errors.append((path, e))
+      with self._lock:
+        self.write_seconds += time.perf_counter() - start
+
+  def _write(self, path: Path, text: str):
+    if self.skip_unchanged and path.is_file() and path.read_text(encoding="utf-8") == text:
+      with self._lock:
+        self.pages_unchanged += 1
+      return
+    tmp_path = _write_temp(path, text)
+    if self.fsync:
+      with self._lock:
+        self._pending_renames.append((tmp_path, path))
+    else:
+      os.replace(tmp_path, path)
+    with self._lock:
+      self.pages_written += 1
+      self.bytes_written += len(text.encode("utf-8"))
+
+  def close(self):
+    '''Wait for every queued page, run the fsync batch if enabled, and raise PageWriteError on any failure.'''
+    if self._closed:
+      return
+    self._closed = True
+    for _ in self._threads:
+      self._queue.put(None)
+    for thread in self._threads:
+      thread.join()
+
+    if self._pending_renames:
+      for tmp_path, path in self._pending_renames:
+        _fsync_path(tmp_path)
+      for tmp_path, path in self._pending_renames:
+        os.replace(tmp_path, path)
+      if os.name == "posix":
+        _fsync_path(self.output_dir)
+      self._pending_renames.clear()
+
+    if self.errors:
+      raise PageWriteError(self.errors)
@@ -0,0 +1,103 @@
+'''Set-based reconciliation of the LMS item list, the item data's LMS wiki pages and the in-game items navbox.
+
+Each source is read once into a dict keyed on the normalized item name (lower case, without the variant's
+"(suffix)", underscores and curly apostrophes folded), so every comparison is a set
+operation and the whole reconciliation is linear in the size of the sources. The result renders as the
+missing_items.generated.md report.
+'''
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable
+
+from osrsreboxed.items_api.item_properties import ItemProperties
+
+from item_variants import Variant
+
+NAVBOX_TITLE = "Template:Last Man Standing in-game items"
+NAVBOX_URL = "https://oldschool.runescape.wiki/w/Template:Last_Man_Standing_in-game_items"
+
+# [[Target]], [[Target|label]] and {{plink|Target|...}}
+_NAVBOX_LINK = re.compile(r"\[\[\s*([^\]|#]+)|\{\{\s*plink\s*\|\s*([^}|]+)", re.I)
+
+
+def normalize_name(name: str, variant: Variant) -> str:
+  name = " ".join(name.replace("_", " ").replace("’", "'").split()).lower()
+  return variant.base_name(name) or name
+
+
+def navbox_names(wikitext: str, variant: Variant) -> list[str]:
+  '''Item names linked from the navbox, in order, without namespaced links or links to the minigame's own pages.'''
+  names = []
+  for match in _NAVBOX_LINK.finditer(wikitext):
+    target = (match.group(1) or match.group(2)).strip()
+    if ":" in target or normalize_name(target, variant).startswith(variant.suffix.lower()) or not target:
+      continue
+    names.append(variant.base_name(target) or target)
+  return names
+
+
+def _keyed(names: Iterable[str], variant: Variant) -> tuple[dict[str, str], list[str]]:
+  '''{normalized name: first spelling} and the spellings of every name seen more than once.'''
+  keyed = {}
+  counts = Counter()
+  for name in names:
+    key = normalize_name(name, variant)
+    keyed.setdefault(key, name)
+    counts[key] += 1
+  return keyed, sorted(keyed[key] for key, n in counts.items() if n > 1)
+
+
+@dataclass
+class Reconciliation:
+  missing_wiki_pages: list[str]
+  missing_from_navbox: list[str]
+  navbox_redlinks: list[str]
+  not_in_item_list: list[str]
+  duplicates: dict[str, list[str]]
+
+  def to_markdown(self) -> str:
+    sections = [
+      (f"Items in lms_item_names missing from the [{NAVBOX_TITLE}]({NAVBOX_URL}) navbox", self.missing_from_navbox),
+      ("Navbox entries without a Last Man Standing item page (redlinks)", self.navbox_redlinks),
+      ("Items in lms_item_names without a Last Man Standing wiki page", self.missing_wiki_pages),
+      ("Navbox entries and LMS wiki pages not in lms_item_names", self.not_in_item_list),
+    ]
+    sections += [(f"Duplicate entries in {source}", names) for source, names in self.duplicates.items()]
+    lines = ["<!-- Generated by `create_lms_page.py missing --navbox`, edits are overwritten -->", ""]
+    for heading, names in sections:
+      lines.append(f"{heading}:")
+      lines.append("")
+      lines.extend(f"- {name}" for name in names)
+      if not names:
+        lines.append("- (none)")
+      lines.append("")
+    return "\n".join(lines)
+
+
+def reconcile(item_names: Iterable[str], lms_wiki_pages: Iterable[ItemProperties], navbox: Iterable[str],
+              variant: Variant) -> Reconciliation:
+  '''Compare the three sources. A wiki page counts for both its item name and its wiki_name, so
+  "Ghostly robe (top)" matches the page whose item is just called "Ghostly robe".'''
+  listed, listed_duplicates = _keyed(item_names, variant)
+  boxed, navbox_duplicates = _keyed(navbox, variant)
+  pages = set()
+  page_counts = Counter()
+  not_in_item_list = {key: name for key, name in boxed.items() if key not in listed}
+  for item in lms_wiki_pages:
+    keys = (normalize_name(item.name, variant), normalize_name(item.wiki_name, variant))
+    pages.update(keys)
+    page_counts[item.wiki_name] += 1
+    if keys[0] not in listed and keys[1] not in listed:
+      not_in_item_list.setdefault(keys[1], item.wiki_name)
+  page_duplicates = sorted(wiki_name for wiki_name, n in page_counts.items() if n > 1)
+
+  return Reconciliation(
+    missing_wiki_pages=sorted(name for key, name in listed.items() if key not in pages),
+    missing_from_navbox=sorted(name for key, name in listed.items() if key not in boxed),
+    navbox_redlinks=sorted(name for key, name in boxed.items() if key not in pages),
+    not_in_item_list=sorted(not_in_item_list.values()),
+    duplicates={"lms_item_names": listed_duplicates, "the navbox": navbox_duplicates,
+                "the LMS wiki pages": page_duplicates},
+  )
@@ -0,0 +1,111 @@
+'''Local HTTP service serving rendered LMS pages from an in-memory LRU cache.
+
+  GET /page/id/<item id>     wikitext of the page, X-Cache: HIT or MISS
+  GET /page/name/<item name>
+  GET /stats                 cache counters as JSON
+
+The process keeps the item database loaded, so a miss only costs one create_lms_item and one render, and a hit
+none at all. Requests are handled on one thread each over HTTP/1.1 keep-alive connections.
+'''
+
+import json
+import threading
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import unquote
+
+from keepalive_handler import KeepAliveHandler
+from metrics import metrics
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class PageCache:
+  '''Thread-safe LRU cache of rendered pages, evicting the least recently used ones beyond max_bytes of text.'''
+
+  def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+    self.max_bytes = max_bytes
+    self.bytes = 0
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self._pages: OrderedDict[tuple, bytes] = OrderedDict()
+    self._lock = threading.Lock()
+
+  def __len__(self) -> int:
+    return len(self._pages)
+
+  def get(self, key: tuple) -> bytes | None:
+    with self._lock:
+      page = self._pages.get(key)
+      if page is None:
+        self.misses += 1
+        return None
+      self._pages.move_to_end(key)
+      self.hits += 1
+      return page
+
+  def put(self, key: tuple, page: bytes):
+    '''Cache page under key; a page bigger than the whole cache is not kept.'''
+    with self._lock:
+      old = self._pages.pop(key, None)
+      if old is not None:
+        self.bytes -= len(old)
+      if len(page) > self.max_bytes:
+        return
+      self._pages[key] = page
+      self.bytes += len(page)
+      while self.bytes > self.max_bytes:
+        _, evicted = self._pages.popitem(last=False)
+        self.bytes -= len(evicted)
+        self.evictions += 1
+
+  def stats(self) -> dict:
+    with self._lock:
+      return {"pages": len(self._pages), "bytes": self.bytes, "max_bytes": self.max_bytes,
+              "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class RenderServer(ThreadingHTTPServer):
+  '''render(kind, value) -> wikitext, with kind "id" or "name", raising KeyError for unknown items.'''
+  daemon_threads = True
+
+  def __init__(self, address: tuple[str, int], render: Callable[[str, str], str], cache: PageCache):
+    super().__init__(address, RenderRequestHandler)
+    self.render = render
+    self.cache = cache
+
+
+class RenderRequestHandler(KeepAliveHandler):
+  server: RenderServer
+
+  def _send_error(self, status: int, message: str):
+    self._send(status, (message + "\n").encode("utf-8"), "text/plain; charset=utf-8")
+
+  def do_GET(self):
+    parts = self.path.split("?", 1)[0].strip("/").split("/", 2)
+    if parts == ["stats"]:
+      self._send(200, json.dumps(self.server.cache.stats()).encode("utf-8"), "application/json")
+      return
+    if len(parts) != 3 or parts[0] != "page" or parts[1] not in ("id", "name"):
+      self._send_error(404, "Expected /page/id/<id>, /page/name/<name> or /stats")
+      return
+
+    kind, value = parts[1], unquote(parts[2])
+    key = (kind, value.lower())
+    page = self.server.cache.get(key)
+    cache_status = "HIT"
+    if page is None:
+      cache_status = "MISS"
+      try:
+        with metrics.stage("serve_render"):
+          page = self.server.render(kind, value).encode("utf-8")
+      except (KeyError, ValueError) as e:
+        self._send_error(404 if isinstance(e, KeyError) else 400, f"No LMS page for {kind} {value!r}: {e}")
+        return
+      except Exception as e:
+        self._send_error(500, f"Rendering {kind} {value!r} failed: {e!r}")
+        return
+      self.server.cache.put(key, page)
+    self._send(200, page, "text/plain; charset=utf-8", {"X-Cache": cache_status})
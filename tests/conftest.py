@@ -0,0 +1,47 @@
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# the modules live flat in the repository root
+sys.path.insert(0, str(REPO_ROOT))
+
+
+@pytest.fixture(scope="session")
+def lms_index():
+  '''ItemIndex over the projected items, the ones the LMS pages are built from.'''
+  from contextlib import redirect_stdout
+  from io import StringIO
+
+  from create_lms_page import load_lms_items
+  from item_index import ItemIndex
+
+  with redirect_stdout(StringIO()):
+    return ItemIndex(load_lms_items(projection=True))
+
+
+@pytest.fixture
+def repo_cwd(monkeypatch):
+  '''Run from the repository root, where the ./templates the renderer reads are.'''
+  monkeypatch.chdir(REPO_ROOT)
+
+
+@pytest.fixture
+def stub_wiki():
+  '''Factory for wiki_stub servers on their own threads, e.g. stub_wiki(existing=titles) or stub_wiki(pages=wikitext),
+  all shut down after the test.'''
+  from wiki_stub import StubWikiServer
+
+  def start(existing=(), redirects=None, pages=None) -> StubWikiServer:
+    server = StubWikiServer(existing, redirects, pages=pages)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    servers.append(server)
+    return server
+
+  servers = []
+  yield start
+  for server in servers:
+    server.shutdown()
+    server.server_close()
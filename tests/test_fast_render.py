@@ -0,0 +1,44 @@
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pytest
+
+import create_lms_page as lms
+from item_cache import load_items
+
+
+@pytest.fixture(scope="module")
+def database_views() -> list[lms.LmsRenderView]:
+  '''A render view of every item in the database LmsRenderView can be built from, equipment or not.'''
+  views = []
+  # LmsRenderView prints every release date it moves up
+  with redirect_stdout(StringIO()):
+    for item in load_items(use_cache=False):
+      try:
+        views.append(lms.LmsRenderView(item))
+      except Exception:
+        pass
+  return views
+
+
+def test_the_lms_template_is_supported(repo_cwd):
+  assert lms.get_fast_template().function is not None
+
+
+def test_generated_function_renders_like_jinja(database_views, repo_cwd):
+  '''Pages the function raises on are left to Jinja by FastTemplate, every other one must be byte-identical.'''
+  template = lms.get_template_env().get_template(lms.TEMPLATE_NAME)
+  function = lms.get_fast_template().function
+  rendered = 0
+  mismatches = []
+  for view in database_views:
+    try:
+      fast = function(view)
+    except Exception:
+      continue
+    rendered += 1
+    if fast != template.render(item=view):
+      mismatches.append(view.wiki_name or view.name)
+  assert rendered > 0
+  assert mismatches == []
+
@@ -0,0 +1,58 @@
+from create_lms_page import LmsItem
+from item_fetch import AsyncFetcher, HttpCache, lms_overrides_from_infobox, parse_infobox_item, wiki_raw_url
+
+WHIP_WIKITEXT = """{{Infobox Item
+|version1 = Regular
+|version2 = Last Man Standing
+|name = Abyssal whip
+|id1 = 4151
+|id2 = 20405
+|members1 = Yes
+|members2 = No
+|tradeable1 = Yes
+|tradeable2 = No
+|exchange1 = Yes
+|exchange2 = No
+|value1 = 120,001
+|value2 = 120,001
+|alchable = Yes
+|buy limit1 = 70
+}}
+"""
+
+PAGES = {"Abyssal whip": WHIP_WIKITEXT, "Dragon claws": "{{Infobox Item\n|name = Dragon claws\n|id = 13652\n}}\n",
+         "Rune defender": "Rune defender wikitext"}
+
+
+def test_fetch_all_is_cached_and_revalidated(stub_wiki, tmp_path):
+  server = stub_wiki(pages=PAGES)
+  urls = [wiki_raw_url(title, server.wiki_url) for title in PAGES]
+
+  fetcher = AsyncFetcher(HttpCache(tmp_path), per_host_interval=0)
+  first = fetcher.fetch_all(urls)
+  assert fetcher.network_requests == len(urls)
+  assert first[urls[0]].decode("utf-8") == WHIP_WIKITEXT
+
+  cached = AsyncFetcher(HttpCache(tmp_path), per_host_interval=0)
+  assert cached.fetch_all(urls) == first
+  assert cached.network_requests == 0
+  assert cached.cache_hits == len(urls)
+
+  expired = AsyncFetcher(HttpCache(tmp_path), per_host_interval=0, ttl=0)
+  assert expired.fetch_all(urls) == first
+  assert expired.network_requests == len(urls)
+  assert expired.not_modified == len(urls)
+  assert server.requests == 2 * len(urls)
+
+
+def test_lms_overrides_from_infobox():
+  overrides = lms_overrides_from_infobox(parse_infobox_item(WHIP_WIKITEXT))
+  assert overrides["id"] == 20405
+  assert overrides["cost"] == 120001
+  assert overrides["highalch"] == 72000
+  assert not overrides["members"] and not overrides["tradeable"]
+  assert LmsItem(**overrides).as_overrides() == overrides
+
+
+def test_page_without_lms_version_has_no_overrides():
+  assert lms_overrides_from_infobox(parse_infobox_item(PAGES["Dragon claws"])) is None
@@ -0,0 +1,33 @@
+import re
+
+from name_index import NAME_INDEX_VERSION, NameIndex, load_name_index, name_index_path
+
+NAMES = ["Spiked manacles", "Dragon knife", "Dragon knife (Last Man Standing)", "Abyssal whip (Soul Wars)"]
+VARIANT_MARKERS = re.compile(r"\(Last Man Standing\)|\(Soul Wars\)")
+
+
+def test_fuzzy_match_ranks_the_closest_name_first():
+  match = NameIndex(NAMES).resolve("Spiked macles")
+  assert match.name == "Spiked manacles"
+
+
+def test_excluded_variant_names_are_never_candidates(tmp_path):
+  name_index = load_name_index(lambda: NAMES, "db", tmp_path, exclude=VARIANT_MARKERS)
+  assert name_index.names == ["Dragon knife", "Spiked manacles"]
+  assert name_index.resolve("Dragon knife (Last Man Standin)").name != "Dragon knife (Last Man Standing)"
+
+
+def test_saved_index_is_keyed_on_the_format_version_and_exclusions(tmp_path):
+  load_name_index(lambda: NAMES, "db", tmp_path, exclude=VARIANT_MARKERS)
+  path = name_index_path("db", VARIANT_MARKERS, tmp_path)
+  assert path.is_file()
+  assert f"v{NAME_INDEX_VERSION}-db-" in path.name
+  assert name_index_path("db", None, tmp_path) != path
+
+
+def test_unreadable_index_is_rebuilt(tmp_path):
+  path = name_index_path("db", None, tmp_path)
+  path.write_bytes(b"\x80\x05truncated")
+  name_index = load_name_index(lambda: NAMES, "db", tmp_path)
+  assert len(name_index) == len(NAMES)
+  assert load_name_index(lambda: [], "db", tmp_path).names == name_index.names
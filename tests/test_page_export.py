@@ -0,0 +1,18 @@
+import pytest
+
+from page_export import ArchiveWriter
+
+PAGES = [("Dragon knife (Last Man Standing)", "{{Infobox Item}}\n", "Dragon knife (Last Man Standing)"),
+         ("Inquisitor's mace (Last Man Standing)", "<b>&</b>\n", None)]
+
+
+def export(path) -> bytes:
+  with ArchiveWriter(path) as writer:
+    for page in PAGES:
+      writer.submit(*page)
+  return path.read_bytes()
+
+
+@pytest.mark.parametrize("suffix", [".xml", ".jsonl", ".tar", ".tar.gz"])
+def test_exports_are_reproducible(tmp_path, suffix):
+  assert export(tmp_path / f"first{suffix}") == export(tmp_path / f"second{suffix}")
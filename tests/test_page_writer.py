@@ -0,0 +1,32 @@
+import os
+import stat
+
+import pytest
+
+from page_writer import PageWriter, write_atomic
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="file modes are POSIX")
+
+
+def mode(path) -> int:
+  return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_files_get_the_umask_mode(tmp_path):
+  umask = os.umask(0)
+  os.umask(umask)
+  write_atomic(tmp_path / "manifest.json", "{}\n", skip_unchanged=False)
+  assert mode(tmp_path / "manifest.json") == 0o666 & ~umask
+
+
+def test_rewritten_files_keep_their_mode(tmp_path):
+  path = tmp_path / "Dragon knife (Last Man Standing).wikitext"
+  path.write_text("old", encoding="utf-8")
+  os.chmod(path, 0o640)
+  write_atomic(path, "new")
+  assert mode(path) == 0o640
+
+  with PageWriter(tmp_path, fsync=True) as writer:
+    writer.submit("Dragon knife (Last Man Standing)", "newer")
+  assert path.read_text(encoding="utf-8") == "newer"
+  assert mode(path) == 0o640
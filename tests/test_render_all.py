@@ -0,0 +1,72 @@
+import time
+from argparse import Namespace
+
+import pytest
+
+import create_lms_page
+from create_lms_page import (BatchRenderError, LmsItem, finish_run, lms_items_without_wiki_page, render_all,
+                             resolve_base_item)
+from page_export import ArchiveWriter
+from page_manifest import PageManifest
+from page_writer import PageWriter
+
+JOB_NAMES = ["Zaryte crossbow", "Dragon knife"]
+
+
+def make_jobs(index):
+  return [(name, resolve_base_item(index, name), LmsItem(**lms_items_without_wiki_page[name])) for name in JOB_NAMES]
+
+
+def render(jobs, output_dir) -> PageManifest:
+  manifest = PageManifest.load(output_dir)
+  with PageWriter(output_dir) as writer:
+    try:
+      render_all(jobs, manifest=manifest, writer=writer)
+    finally:
+      finish_run(Namespace(prune=True, export=None, profile=False, memory_budget=None), manifest, writer)
+  return manifest
+
+
+def test_prune_keeps_the_page_of_a_failed_render(lms_index, tmp_path, monkeypatch, repo_cwd):
+  jobs = make_jobs(lms_index)
+  render(jobs, tmp_path)
+  page = tmp_path / "Zaryte crossbow (Last Man Standing).wikitext"
+  last_good = page.read_text(encoding="utf-8")
+  orphan = tmp_path / "Removed item (Last Man Standing).wikitext"
+  orphan.write_text("no longer generated", encoding="utf-8")
+
+  create_lms_item = create_lms_page.create_lms_item
+
+  def failing_create_lms_item(original_item, lms_item, variant=None):
+    if lms_item.id == 27186:
+      raise RuntimeError("broken override")
+    return create_lms_item(original_item, lms_item, variant)
+
+  monkeypatch.setattr(create_lms_page, "create_lms_item", failing_create_lms_item)
+  with pytest.raises(BatchRenderError):
+    render(jobs, tmp_path)
+
+  assert page.read_text(encoding="utf-8") == last_good
+  assert "Zaryte crossbow (Last Man Standing)" in PageManifest.load(tmp_path).pages
+  assert not orphan.exists()
+
+
+def test_thread_workers_export_in_job_order(lms_index, tmp_path, monkeypatch, repo_cwd):
+  jobs = [(name, resolve_base_item(lms_index, name), LmsItem(**data))
+          for name, data in list(lms_items_without_wiki_page.items())[:8]]
+  create_lms_item = create_lms_page.create_lms_item
+  delays = {lms_item.id: 0.01 * (len(jobs) - i) for i, (_, _, lms_item) in enumerate(jobs)}
+
+  def slow_create_lms_item(original_item, lms_item, variant=None):
+    # the first jobs finish last
+    time.sleep(delays[lms_item.id])
+    return create_lms_item(original_item, lms_item, variant)
+
+  monkeypatch.setattr(create_lms_page, "create_lms_item", slow_create_lms_item)
+  exports = []
+  for workers in (1, 4):
+    path = tmp_path / f"workers-{workers}.jsonl"
+    with ArchiveWriter(path) as writer:
+      render_all(jobs, workers=workers, executor="thread", writer=writer)
+    exports.append(path.read_bytes())
+  assert exports[0] == exports[1]
@@ -0,0 +1,28 @@
+from wiki_api import WikiClient
+
+
+def test_titles_are_checked_50_per_request(stub_wiki):
+  titles = [f"Item {i}" for i in range(101)]
+  server = stub_wiki(existing=titles[::2])
+  with WikiClient(server.api_url) as client:
+    exists = client.pages_exist(titles)
+  assert client.requests == 3
+  assert server.requests == 3
+  assert exists == {title: i % 2 == 0 for i, title in enumerate(titles)}
+
+
+def test_normalized_and_redirected_titles_map_back(stub_wiki):
+  server = stub_wiki(existing=["Dragon knife (Last Man Standing)"],
+                     redirects={"Dragon knives (Last Man Standing)": "Dragon knife (Last Man Standing)"})
+  titles = ["dragon_knife_(Last_Man_Standing)", "Dragon knives (Last Man Standing)", "dragon knives (Last Man Standing)"]
+  with WikiClient(server.api_url) as client:
+    assert client.pages_exist(titles) == {title: True for title in titles}
+
+
+def test_missing_pages_are_false(stub_wiki):
+  server = stub_wiki(existing=["Abyssal whip (Last Man Standing)"])
+  with WikiClient(server.api_url) as client:
+    exists = client.pages_exist(["Abyssal whip (Last Man Standing)", "Bronze whip (Last Man Standing)",
+                                 "missing_redirect_target"])
+  assert exists == {"Abyssal whip (Last Man Standing)": True, "Bronze whip (Last Man Standing)": False,
+                    "missing_redirect_target": False}
@@ -0,0 +1,125 @@
+'''Minimal MediaWiki API client for page existence checks.
+
+Titles are checked 50 per action=query request (MediaWiki's limit for normal users), and batches run
+concurrently over a pool of keep-alive HTTP connections, so checking a few hundred titles costs a handful of
+round trips. Normalized titles ("dragon_knife" -> "Dragon knife") and redirects are followed back to the
+title that was asked about. stdlib only; see wiki_stub.py for an offline stand-in server.
+'''
+
+import gzip
+import http.client
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+from urllib.parse import urlencode, urlsplit
+
+from metrics import metrics
+
+WIKI_API_URL = "https://oldschool.runescape.wiki/api.php"
+# the OSRS wiki asks API users to identify themselves
+USER_AGENT = "create_lms_page (Last Man Standing item page generator)"
+MAX_TITLES_PER_QUERY = 50
+
+
+class WikiApiError(Exception):
+  pass
+
+
+class WikiClient:
+  '''Pooled, thread-safe client for one api.php endpoint.'''
+
+  def __init__(self, api_url: str = WIKI_API_URL, workers: int = 4, timeout: float = 30.0,
+               user_agent: str = USER_AGENT):
+    url = urlsplit(api_url)
+    if url.scheme not in ("http", "https"):
+      raise ValueError(f"Unsupported wiki API URL {api_url!r}")
+    self.api_url = api_url
+    self.workers = workers
+    self.timeout = timeout
+    self.user_agent = user_agent
+    self.requests = 0
+    self._connection_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+    self._host = url.netloc
+    self._path = url.path or "/"
+    self._idle: queue.LifoQueue = queue.LifoQueue()
+    self._lock = threading.Lock()
+
+  def __enter__(self) -> 'WikiClient':
+    return self
+
+  def __exit__(self, exc_type, exc, tb):
+    self.close()
+
+  def close(self):
+    while True:
+      try:
+        self._idle.get_nowait().close()
+      except queue.Empty:
+        return
+
+  def _new_connection(self) -> http.client.HTTPConnection:
+    return self._connection_class(self._host, timeout=self.timeout)
+
+  def _request(self, conn: http.client.HTTPConnection, params: dict) -> http.client.HTTPResponse:
+    conn.request("GET", f"{self._path}?{urlencode(params)}",
+                 headers={"User-Agent": self.user_agent, "Accept-Encoding": "gzip"})
+    return conn.getresponse()
+
+  def get(self, params: dict) -> dict:
+    '''One GET against api.php, decoded from JSON. Raises WikiApiError for HTTP or API errors.'''
+    try:
+      conn = self._idle.get_nowait()
+    except queue.Empty:
+      conn = self._new_connection()
+    try:
+      with metrics.stage("wiki_api_request"):
+        try:
+          response = self._request(conn, params)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+          # the server closed an idle keep-alive connection, retry once on a fresh one
+          conn.close()
+          conn = self._new_connection()
+          response = self._request(conn, params)
+        body = response.read()
+    except BaseException:
+      conn.close()
+      raise
+    self._idle.put(conn)
+    with self._lock:
+      self.requests += 1
+    metrics.count("wiki_api_requests")
+
+    if response.status != 200:
+      raise WikiApiError(f"{self.api_url} returned HTTP {response.status}")
+    if response.getheader("Content-Encoding") == "gzip":
+      body = gzip.decompress(body)
+    data = json.loads(body)
+    if "error" in data:
+      raise WikiApiError(f"{data['error'].get('code')}: {data['error'].get('info')}")
+    return data
+
+  def _exists_batch(self, titles: list[str]) -> dict[str, bool]:
+    data = self.get({"action": "query", "titles": "|".join(titles), "redirects": 1,
+                     "format": "json", "formatversion": 2})
+    query = data.get("query", {})
+    resolved = {title: title for title in titles}
+    for step in ("normalized", "redirects"):
+      renamed = {entry["from"]: entry["to"] for entry in query.get(step, [])}
+      resolved = {title: renamed.get(target, target) for title, target in resolved.items()}
+    exists = {page["title"]: not (page.get("missing") or page.get("invalid")) for page in query.get("pages", [])}
+    return {title: exists.get(target, False) for title, target in resolved.items()}
+
+  def pages_exist(self, titles: Iterable[str], batch_size: int = MAX_TITLES_PER_QUERY) -> dict[str, bool]:
+    '''{title: whether the page, or the page it redirects to, exists} for every distinct title.'''
+    titles = list(dict.fromkeys(titles))
+    for title in titles:
+      if "|" in title:
+        raise ValueError(f"Page titles can't contain '|': {title!r}")
+    batches = [titles[i:i + batch_size] for i in range(0, len(titles), batch_size)]
+    exists = {}
+    with ThreadPoolExecutor(max_workers=self.workers) as pool:
+      for batch_exists in pool.map(self._exists_batch, batches):
+        exists.update(batch_exists)
+    return exists
@@ -0,0 +1,132 @@
+'''Offline stand-in for the wiki, answering api.php action=query existence checks and /w/<title>?action=raw.
+
+Knows a fixed set of existing pages, their wikitext and redirects, normalizes titles the way MediaWiki does
+(underscores to spaces, first letter upper case), rejects more than 50 titles per query like the real API,
+and counts the requests it served. Raw pages carry an ETag and Last-Modified and answer conditional requests
+with 304. An optional per-request latency makes round trips show up in timings.
+
+  python wiki_stub.py --port 8089 --existing titles.txt
+  python create_lms_page.py --check-wiki --wiki-api http://127.0.0.1:8089/api.php
+'''
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterable
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from keepalive_handler import KeepAliveHandler
+from wiki_api import MAX_TITLES_PER_QUERY
+
+
+def normalize_title(title: str) -> str:
+  title = " ".join(title.replace("_", " ").split())
+  return title[:1].upper() + title[1:]
+
+
+class StubWikiServer(ThreadingHTTPServer):
+  daemon_threads = True
+
+  def __init__(self, existing: Iterable[str], redirects: dict[str, str] | None = None,
+               address: tuple[str, int] = ("127.0.0.1", 0), latency: float = 0.0, pages: dict[str, str] | None = None):
+    super().__init__(address, StubWikiHandler)
+    self.pages = {normalize_title(title): text for title, text in (pages or {}).items()}
+    self.existing = {normalize_title(title) for title in existing} | self.pages.keys()
+    self.last_modified = formatdate(time.time(), usegmt=True)
+    self.redirects = {normalize_title(source): normalize_title(target) for source, target in (redirects or {}).items()}
+    self.latency = latency
+    self.requests = 0
+    self._lock = threading.Lock()
+
+  @property
+  def wiki_url(self) -> str:
+    host, port = self.server_address[:2]
+    return f"http://{host}:{port}"
+
+  @property
+  def api_url(self) -> str:
+    return f"{self.wiki_url}/api.php"
+
+  def query(self, titles: list[str]) -> dict:
+    if len(titles) > MAX_TITLES_PER_QUERY:
+      return {"error": {"code": "toomanyvalues",
+                        "info": f"Too many values supplied for parameter \"titles\". The limit is {MAX_TITLES_PER_QUERY}."}}
+    query = {"normalized": [], "redirects": [], "pages": []}
+    seen = set()
+    for title in titles:
+      normalized = normalize_title(title)
+      if normalized != title:
+        query["normalized"].append({"from": title, "to": normalized})
+      target = self.redirects.get(normalized)
+      if target is not None:
+        query["redirects"].append({"from": normalized, "to": target})
+        normalized = target
+      if normalized in seen:
+        continue
+      seen.add(normalized)
+      if normalized in self.existing:
+        query["pages"].append({"pageid": len(seen), "ns": 0, "title": normalized})
+      else:
+        query["pages"].append({"ns": 0, "title": normalized, "missing": True})
+    return {"batchcomplete": True, "query": {key: value for key, value in query.items() if value}}
+
+
+class StubWikiHandler(KeepAliveHandler):
+  server: StubWikiServer
+
+  def _send_raw_page(self, title: str):
+    text = self.server.pages.get(normalize_title(title))
+    if text is None:
+      self._send(404, b"", "text/x-wiki; charset=utf-8")
+      return
+    body = text.encode("utf-8")
+    headers = {"ETag": '"' + hashlib.sha1(body).hexdigest() + '"', "Last-Modified": self.server.last_modified}
+    if self.headers.get("If-None-Match") == headers["ETag"]:
+      self._send(304, b"", "text/x-wiki; charset=utf-8", headers)
+      return
+    self._send(200, body, "text/x-wiki; charset=utf-8", headers)
+
+  def do_GET(self):
+    url = urlsplit(self.path)
+    params = {key: values[0] for key, values in parse_qs(url.query).items()}
+    with self.server._lock:
+      self.server.requests += 1
+    if self.server.latency:
+      time.sleep(self.server.latency)
+    if url.path.startswith("/w/") and params.get("action") == "raw":
+      self._send_raw_page(unquote(url.path[len("/w/"):]))
+      return
+    if url.path != "/api.php" or params.get("action") != "query" or "titles" not in params:
+      data = {"error": {"code": "badparams", "info": "Only action=query with titles is supported"}}
+    else:
+      data = self.server.query(params["titles"].split("|"))
+    self._send(200, json.dumps(data).encode("utf-8"), "application/json; charset=utf-8")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--port", type=int, default=8089)
+  parser.add_argument("--existing", type=Path, help="file with one existing page title per line")
+  parser.add_argument("--pages", type=Path, help="JSON file of {title: wikitext} served by /w/<title>?action=raw")
+  parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+  args = parser.parse_args()
+  existing = args.existing.read_text(encoding="utf-8").splitlines() if args.existing else []
+  pages = json.loads(args.pages.read_text(encoding="utf-8")) if args.pages else {}
+  server = StubWikiServer(existing, address=("127.0.0.1", args.port), latency=args.latency, pages=pages)
+  print(f"Stub wiki API with {len(server.existing)} pages on {server.api_url}, Ctrl-C to stop")
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+  print(f"Served {server.requests} requests")
+
+
+if __name__ == "__main__":
+  main()